@@ -1,17 +1,27 @@
+from dataclasses import dataclass
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
+import time
 import jwt
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event, inspect
+from sqlalchemy.orm import Session
 
 from app.models.users import User as UserModel
 from app.config import settings  # <-- ИМПОРТИРУЕМ ОБЪЕКТ НАСТРОЕК
 from app.db_depends import get_async_db
+from app.utils.hashing import PasswordHashPool
+from app.utils.ttl_cache import TTLCache
 
 # Создаём контекст для хеширования с использованием bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# Пул потоков, в котором выполняется bcrypt из асинхронных обработчиков
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS,
+                                 settings.PASSWORD_HASH_MAX_PENDING,
+                                 settings.PASSWORD_HASH_TIMEOUT)
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
@@ -19,6 +29,22 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
 
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Аутентифицированный пользователь, не привязанный к сессии базы данных.
+    """
+    id: int
+    email: str
+    role: str
+    is_active: bool = True
+
+
+# Проверенные токены (token -> payload) и найденные пользователи ((email, id) -> Principal)
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL)
+principal_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL)
+
+
 def hash_password(password: str) -> str:
     """
     Преобразует пароль в хеш с использованием bcrypt.
@@ -33,6 +59,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """
+    Хеширует пароль в пуле потоков, не блокируя event loop.
+    """
+    return await password_pool.run(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль в пуле потоков. Если хеш создан с устаревшими параметрами
+    (например, другим BCRYPT_ROUNDS), вторым элементом возвращается новый хеш.
+    """
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     """
     Создаёт JWT с payload (sub, role, id, exp).
@@ -55,10 +96,77 @@ def create_refresh_token(data: dict):
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+def decode_token(token: str) -> dict:
+    """
+    Проверяет подпись и срок действия JWT. Уже проверенные токены берутся из кэша,
+    срок действия при этом проверяется заново.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return payload
+    # Используем settings.SECRET_KEY и settings.ALGORITHM
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    return payload
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Удаляет пользователя из кэша аутентификации (деактивация, смена роли).
+    """
+    for key, principal in principal_cache.items():
+        if principal.id == user_id:
+            principal_cache.pop(key)
+
+
+def auth_cache_stats() -> dict:
+    """
+    Возвращает счётчики попаданий и промахов кэшей аутентификации.
+    """
+    return {"tokens": token_cache.stats(), "principals": principal_cache.stats()}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    """
+    Запоминает пользователей, у которых изменились is_active или role.
+    """
+    for obj in session.dirty:
+        if isinstance(obj, UserModel):
+            state = inspect(obj)
+            if state.attrs.is_active.history.has_changes() or state.attrs.role.history.has_changes():
+                session.info.setdefault("changed_user_ids", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    """
+    После фиксации транзакции сбрасывает кэш для изменённых пользователей.
+    """
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_update(orm_execute_state):
+    """
+    Массовый UPDATE пользователей сбрасывает кэш целиком.
+    """
+    if orm_execute_state.is_update and orm_execute_state.bind_mapper is inspect(UserModel):
+        principal_cache.clear()
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme),
-                           db: AsyncSession = Depends(get_async_db)):
+                           db: AsyncSession = Depends(get_async_db)) -> Principal:
     """
-    Проверяет JWT и возвращает пользователя из базы.
+    Проверяет JWT и возвращает пользователя (из кэша или из базы).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,8 +174,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        # Используем settings.SECRET_KEY и settings.ALGORITHM
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -79,16 +186,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
         )
     except jwt.PyJWTError:
         raise credentials_exception
+
+    user_id = payload.get("id")
+    role = payload.get("role")
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and isinstance(user_id, int) and role:
+        return Principal(id=user_id, email=email, role=role)
+
+    key = (email, user_id)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
     result = await db.scalars(
         select(UserModel).where(UserModel.email == email, UserModel.is_active == True)
     )
     user = result.first()
-    if user is None:
+    if user is None or (user_id is not None and user.id != user_id):
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+    principal_cache.set(key, principal)
+    return principal
 
 
-async def get_current_seller(current_user: UserModel = Depends(get_current_user)):
+async def get_current_seller(current_user: Principal = Depends(get_current_user)):
     """
     Проверяет, что пользователь имеет роль 'seller'.
     """
@@ -98,7 +218,7 @@ async def get_current_seller(current_user: UserModel = Depends(get_current_user)
     return current_user
 
 
-def get_current_buyer(current_user: UserModel = Depends(get_current_user)):
+def get_current_buyer(current_user: Principal = Depends(get_current_user)):
     """Проверяет, является ли текущий пользователь покупателем или администратором."""
     if current_user.role not in ["buyer", "admin"]:
         raise HTTPException(
@@ -108,7 +228,7 @@ def get_current_buyer(current_user: UserModel = Depends(get_current_user)):
     return current_user
 
 
-def get_current_admin(current_user: UserModel = Depends(get_current_user)):
+def get_current_admin(current_user: Principal = Depends(get_current_user)):
     """Проверяет, является ли текущий пользователь администратором ('admin')."""
     if current_user.role != "admin":
         raise HTTPException(
@@ -1,4 +1,6 @@
 import os
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,9 +12,111 @@ class Settings(BaseSettings):
     # Основные настройки FastAPI
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # Режим отладки: заголовки X-DB-Queries / X-DB-Time в ответах
+    DEBUG: bool = False
+    # Сбор метрик запросов для /metrics
+    METRICS_ENABLED: bool = True
+
+    # Кэш аутентификации: проверенные токены и найденные пользователи
+    AUTH_CACHE_TTL: float = 30.0
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    # Авторизация только по подписанным claims role/id без обращения к базе.
+    # Смена роли или деактивация вступают в силу лишь после истечения токена.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Хеширование паролей: стоимость bcrypt и пул потоков, в котором оно выполняется.
+    # При изменении BCRYPT_ROUNDS хеши пересчитываются при следующем входе пользователя.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_TIMEOUT: float = 5.0
 
     # Настройки базы данных
     DATABASE_URL: str
+    # Реплика только для чтения (если не задана, чтение идёт в основную базу)
+    DATABASE_READ_URL: str | None = None
+
+    # Пул соединений (одинаковые настройки для основной базы и реплики)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # Размер кэша подготовленных выражений asyncpg (0 — отключить)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Логирование всех SQL-запросов
+    DB_ECHO: bool = False
+    # Сколько SQL-запросов на один HTTP-запрос допустимо без предупреждения в логе
+    DB_QUERY_BUDGET: int = 10
+
+    # Кэш дерева категорий: максимальный возраст снимка в секундах.
+    # Внутри процесса снимок сбрасывается при каждой записи в категории,
+    # TTL ограничивает устаревание в остальных воркерах.
+    CATEGORY_CACHE_TTL: float = 60.0
+
+    # Массовый импорт товаров: размер пакета вставки и сколько ошибок строк возвращать
+    PRODUCT_IMPORT_BATCH_SIZE: int = 2000
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000
+    # Максимальная длина строки NDJSON или записи CSV (символов): более длинная строка
+    # не буферизуется, а попадает в ошибки, и разбор продолжается со следующей строки
+    PRODUCT_IMPORT_MAX_LINE_LENGTH: int = 65536
+
+    # Пакетное получение товаров: максимальное число ID в одном запросе
+    PRODUCT_BATCH_MAX_IDS: int = 500
+
+    # Заголовок Cache-Control для ответов с ETag
+    PRODUCT_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+    CATEGORY_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+    REVIEW_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+
+    # Кэш сериализованных ответов горячих GET-эндпоинтов товаров
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: float = 5.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+
+    # Потоковая выгрузка: сколько строк читать из серверного курсора за раз
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Пересчёт рейтинга при записи отзывов:
+    # "inline" — счётчики товара меняются в транзакции отзыва (синхронно, удобно для тестов);
+    # "background" — товар помечается «грязным», фоновая очередь пересчитывает рейтинги пакетами.
+    RATING_UPDATE_MODE: Literal["inline", "background"] = "inline"
+    # Сколько секунд копить изменения перед пересчётом и максимальный размер пакета товаров
+    RATING_QUEUE_DEBOUNCE: float = 0.5
+    RATING_QUEUE_BATCH_SIZE: int = 500
+
+    # Журнал изменений каталога: размер пакета, опрос журнала для SSE,
+    # интервал пустых keep-alive сообщений и срок хранения записей
+    CHANGE_FEED_BATCH_SIZE: int = 500
+    CHANGE_FEED_POLL_INTERVAL: float = 1.0
+    CHANGE_FEED_HEARTBEAT: float = 15.0
+    CHANGE_LOG_RETENTION_DAYS: int = 7
+
+    # Резервирование товаров: срок жизни неподтверждённого резерва (с), предел позиций,
+    # повторы при взаимоблокировке, период и размер пачки освобождения просроченных резервов
+    RESERVATION_TTL: int = 900
+    RESERVATION_MAX_ITEMS: int = 100
+    RESERVATION_DEADLOCK_RETRIES: int = 3
+    RESERVATION_SWEEP_INTERVAL: float = 30.0
+    RESERVATION_SWEEP_BATCH_SIZE: int = 500
+
+    # Ограничение частоты запросов (429 с Retry-After).
+    # Правила: "МЕТОД /путь" или "*" -> список лимитов "ip:N/секунд" или "user:N/секунд";
+    # лимит "user" считается по ID из Bearer-токена. По умолчанию ограничены только
+    # эндпоинты с bcrypt. Для нагрузочных прогонов с одного IP лимиты стоит отключить.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RULES: dict[str, list[str]] = {
+        "POST /users/token": ["ip:10/60"],
+        "POST /users/": ["ip:5/60"],
+    }
+    # Корзины токенов в памяти: максимум корзин и время простоя до удаления (с).
+    # Время простоя должно быть не меньше самого длинного периода в правилах.
+    RATE_LIMIT_MAX_BUCKETS: int = 100000
+    RATE_LIMIT_IDLE_TTL: float = 3600.0
+    # Число доверенных прокси перед приложением. 0 — X-Forwarded-For не используется;
+    # N — IP клиента берётся N-м с конца X-Forwarded-For: левые записи может подставить сам клиент,
+    # а последние N дописаны нашими прокси
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0
 
 
 # Создаем единственный экземпляр настроек, который будет использоваться во всем приложении
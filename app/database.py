@@ -1,21 +1,116 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import settings
+
+
+class PoolWaitStats:
+    """
+    Статистика ожидания соединения из пула.
+    """
+
+    def __init__(self):
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_seconds += seconds
+        if seconds > self.max_wait_seconds:
+            self.max_wait_seconds = seconds
+
 
-load_dotenv()
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий время ожидания свободного соединения.
+    Ожиданием считается только выдача при исчерпанном пуле (нет свободных соединений
+    и достигнут max_overflow): выдача свободного соединения и создание нового
+    в пределах переполнения не блокируют и в статистику не попадают.
+    Для каждого engine создаётся подкласс со своим объектом stats:
+    атрибут класса переживает пересоздание пула (dispose/recreate).
+    """
+    stats: PoolWaitStats
 
-# Строка подключения для PostgreSQl
-DATABASE_URL = os.environ.get("DATABASE_URL")
+    def _do_get(self):
+        # То же условие, при котором QueuePool ждёт возврата соединения в очередь
+        exhausted = self._max_overflow > -1 and self._overflow >= self._max_overflow
+        if not exhausted or self.checkedin() > 0:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - started)
 
-if not DATABASE_URL:
-    raise ValueError("Переменная окружения DATABASE_URL не установлена!")
 
-# Создаём Engine
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+def _engine_url(url: str) -> URL:
+    engine_url = make_url(url)
+    if engine_url.get_driver_name() == "asyncpg":
+        # Кэш подготовленных выражений asyncpg (0 — отключить, например за pgbouncer)
+        engine_url = engine_url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+    return engine_url
 
-# Настраиваем фабрику сеансов
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    pool_class = type(f"{name.title()}Pool", (TimedQueuePool,), {"stats": PoolWaitStats()})
+    return create_async_engine(
+        _engine_url(url),
+        echo=settings.DB_ECHO,
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+
+# Engine основной базы (все записи)
+async_engine = _create_engine(settings.DATABASE_URL, "primary")
+
+# Engine реплики только для чтения; без DATABASE_READ_URL чтение идёт в основную базу
+read_engine = (_create_engine(settings.DATABASE_READ_URL, "replica")
+               if settings.DATABASE_READ_URL else async_engine)
+
+# Настраиваем фабрики сеансов
 async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+async_read_session_maker = async_sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+
+
+def pool_status() -> dict[str, dict]:
+    """
+    Текущее состояние пулов соединений: занятые, переполнение и ожидание.
+    """
+    engines = {"primary": async_engine}
+    if read_engine is not async_engine:
+        engines["replica"] = read_engine
+    status = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        stats = pool.stats
+        status[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "waits": stats.waits,
+            "wait_seconds_total": round(stats.wait_seconds, 6),
+            "wait_seconds_max": round(stats.max_wait_seconds, 6),
+            "timeouts": stats.timeouts,
+        }
+    return status
 
 
 class Base(DeclarativeBase):
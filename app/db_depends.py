@@ -1,6 +1,6 @@
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import async_session_maker
+from app.database import async_session_maker, async_read_session_maker
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
@@ -9,3 +9,12 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     async with async_session_maker() as session:
         yield session
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Предоставляет сессию для чтения: реплика, если задан DATABASE_READ_URL, иначе основная база.
+    Используется только эндпоинтами, которые ничего не записывают.
+    """
+    async with async_read_session_maker() as session:
+        yield session
@@ -1,17 +1,57 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.auth import password_pool
+from app.database import async_engine, read_engine, pool_status
+from app.config import settings
+from app.middleware.metrics import MetricsMiddleware, render_metrics
+from app.middleware.query_stats import QueryStatsMiddleware, install_query_hooks
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.routers import categories, changes, products, reservations, users, reviews
+from app.utils.rating_queue import rating_queue
+from app.utils.reservations import reservation_sweeper
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск и остановка фоновых ресурсов приложения.
+    """
+    if settings.RATING_UPDATE_MODE == "background":
+        rating_queue.start()
+    reservation_sweeper.start()
+    yield
+    await reservation_sweeper.stop()
+    # Досчитываем рейтинги, накопленные в очереди, до закрытия пула соединений
+    await rating_queue.stop()
+    password_pool.shutdown()
 
-from app.routers import categories, products, users, reviews
 
 app = FastAPI(
     title="Интернет магазин",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Подсчёт SQL-запросов на каждый HTTP-запрос
+install_query_hooks(async_engine)
+if read_engine is not async_engine:
+    install_query_hooks(read_engine)
+app.add_middleware(QueryStatsMiddleware)
+# Ограничение частоты запросов до выполнения эндпоинтов (429 попадают в метрики)
+app.add_middleware(RateLimitMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Маршруты
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+app.include_router(changes.router)
+app.include_router(reservations.router)
 
 # Корневой эндпоинт для проверки
 @app.get("/")
@@ -20,3 +60,27 @@ async def root():
     Корневой маршрут, подтверждающий, что API работает.
     """
     return {"message": "Добро пожаловать в API интернет-магазина!"}
+
+
+@app.get("/health/db-pool")
+async def db_pool_health():
+    """
+    Состояние пулов соединений с базой: занятые соединения, переполнение и ожидание.
+    """
+    return pool_status()
+
+
+@app.get("/health/rating-queue")
+async def rating_queue_health():
+    """
+    Состояние очереди пересчёта рейтингов: ожидающие товары и отставание в секундах.
+    """
+    return rating_queue.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,98 @@
+"""
+Служебные команды приложения.
+
+Запуск: python -m app.manage <команда> [параметры]
+"""
+import argparse
+import asyncio
+
+from datetime import timedelta
+
+from app.config import settings
+from app.database import async_session_maker
+from app.utils.change_log import compact_changes
+from app.utils.rating import rebuild_product_ratings
+from app.utils.read_model import rebuild_product_listings
+from app.utils.reservations import sweep_expired_reservations
+from app.utils.response_cache import response_cache
+
+
+async def rebuild_ratings(dry_run: bool) -> None:
+    """
+    Пересобирает счётчики рейтинга товаров по таблице отзывов и печатает расхождения.
+    """
+    async with async_session_maker() as db:
+        drift = await rebuild_product_ratings(db, fix=not dry_run)
+        if not dry_run:
+            await db.commit()
+
+    for row in drift[:50]:
+        print(f"product_id={row['product_id']}: "
+              f"count {row['stored_count']} -> {row['rating_count']}, "
+              f"sum {row['stored_sum']} -> {row['rating_sum']}, "
+              f"rating {row['stored_rating']}")
+    if len(drift) > 50:
+        print(f"... и ещё {len(drift) - 50}")
+    action = "найдено" if dry_run else "исправлено"
+    print(f"Товаров с расхождениями {action}: {len(drift)}")
+
+
+async def compact_change_log(retention_days: int) -> None:
+    """
+    Удаляет устаревшие и перекрытые более новыми записи журнала изменений.
+    """
+    async with async_session_maker() as db:
+        result = await compact_changes(db, timedelta(days=retention_days))
+        await db.commit()
+    print(f"Удалено перекрытых записей: {result['superseded']}, устаревших: {result['expired']}")
+    if result["compacted_through"] is not None:
+        print(f"Журнал хранится начиная с версии {result['compacted_through']}")
+
+
+async def release_expired() -> None:
+    """
+    Освобождает просроченные резервы и возвращает их остатки на склад.
+    """
+    released = await sweep_expired_reservations()
+    print(f"Освобождено просроченных резервов: {released}")
+
+
+async def rebuild_listings() -> None:
+    """
+    Пересобирает модель чтения product_listings по таблицам товаров и категорий.
+    """
+    async with async_session_maker() as db:
+        written = await rebuild_product_listings(db)
+        await db.commit()
+    await response_cache.invalidate("products")
+    print(f"Записано строк модели чтения: {written}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="Служебные команды")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ratings = commands.add_parser("rebuild-ratings", help="Пересобрать счётчики рейтинга товаров")
+    ratings.add_argument("--dry-run", action="store_true", help="Только показать расхождения")
+
+    compact = commands.add_parser("compact-changes", help="Компактизировать журнал изменений каталога")
+    compact.add_argument("--retention-days", type=int, default=settings.CHANGE_LOG_RETENTION_DAYS,
+                         help="Сколько дней хранить записи журнала")
+
+    commands.add_parser("release-expired-reservations", help="Освободить просроченные резервы товаров")
+
+    commands.add_parser("rebuild-listings", help="Пересобрать модель чтения каталога product_listings")
+
+    args = parser.parse_args()
+    if args.command == "rebuild-ratings":
+        asyncio.run(rebuild_ratings(args.dry_run))
+    elif args.command == "compact-changes":
+        asyncio.run(compact_change_log(args.retention_days))
+    elif args.command == "release-expired-reservations":
+        asyncio.run(release_expired())
+    elif args.command == "rebuild-listings":
+        asyncio.run(rebuild_listings())
+
+
+if __name__ == "__main__":
+    main()
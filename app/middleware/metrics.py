@@ -0,0 +1,185 @@
+import time
+from bisect import bisect_left
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth import auth_cache_stats, password_pool
+from app.database import pool_status
+from app.middleware.rate_limit import rate_limiter
+from app.utils.rating_queue import rating_queue
+from app.utils.response_cache import response_cache
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами в формате Prometheus.
+    Все запросы обслуживаются одним циклом событий, поэтому запись —
+    обычные инкременты без блокировок.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """
+    Метрики HTTP-запросов: задержки по шаблону маршрута, запросы в обработке, коды ответов.
+    """
+
+    def __init__(self):
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.responses: dict[tuple[str, str, int], int] = {}
+        self.in_flight: dict[str, int] = {}
+
+    def record(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram()
+        histogram.observe(seconds)
+        key = (method, route, status_code)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики по каждому HTTP-запросу. Маршрут берётся как шаблон
+    (/products/{product_id}), чтобы число рядов не росло вместе с числом ID;
+    отклонённые лимитом запросов — в ряд ключа правила ("POST /users/token"),
+    остальные запросы без подходящего маршрута — в ряд "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        method = scope["method"]
+        status_code = 500
+        metrics.in_flight[method] = metrics.in_flight.get(method, 0) + 1
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight[method] -= 1
+            route = scope.get("route")
+            label = route.path if route is not None else scope.get("rate_limit_rule", "unmatched")
+            metrics.record(method, label, status_code, time.perf_counter() - started)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _family(lines: list[str], name: str, kind: str, help_text: str,
+            samples: list[tuple[dict, float]]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {value}")
+
+
+def render_metrics(metrics: RequestMetrics = request_metrics) -> str:
+    """
+    Текстовый формат Prometheus (text/plain; version=0.0.4).
+    """
+    lines: list[str] = []
+
+    name = "http_request_duration_seconds"
+    lines.append(f"# HELP {name} Длительность обработки HTTP-запроса")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(metrics.latency.items()):
+        labels = {"method": method, "route": route}
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    _family(lines, "http_responses_total", "counter", "Ответы по маршруту и коду состояния",
+            [({"method": method, "route": route, "status": code}, count)
+             for (method, route, code), count in sorted(metrics.responses.items())])
+    _family(lines, "http_requests_in_flight", "gauge", "Запросы в обработке",
+            [({"method": method}, count) for method, count in sorted(metrics.in_flight.items())])
+
+    pools = pool_status()
+    for metric, field, kind, help_text in (
+            ("db_pool_size", "size", "gauge", "Размер пула соединений"),
+            ("db_pool_checked_out", "checked_out", "gauge", "Занятые соединения"),
+            ("db_pool_overflow", "overflow", "gauge", "Соединения сверх размера пула"),
+            ("db_pool_waits_total", "waits", "counter", "Ожидания соединения при исчерпанном пуле"),
+            ("db_pool_wait_seconds_total", "wait_seconds_total", "counter", "Суммарное время ожидания соединения"),
+            ("db_pool_wait_seconds_max", "wait_seconds_max", "gauge", "Максимальное время ожидания соединения"),
+            ("db_pool_timeouts_total", "timeouts", "counter", "Таймауты ожидания соединения"),
+    ):
+        _family(lines, metric, kind, help_text,
+                [({"pool": pool}, values[field]) for pool, values in pools.items()])
+
+    hashing = password_pool.stats()
+    _family(lines, "password_hash_pending", "gauge", "Задачи bcrypt в очереди и в работе",
+            [({}, hashing["pending"])])
+    _family(lines, "password_hash_max_pending", "gauge", "Предел очереди bcrypt",
+            [({}, hashing["max_pending"])])
+    _family(lines, "password_hash_rejected_total", "counter", "Отклонённые из-за переполнения задачи bcrypt",
+            [({}, hashing["rejected"])])
+
+    cache = response_cache.stats()
+    _family(lines, "response_cache_hits_total", "counter", "Попадания в кэш ответов", [({}, cache["hits"])])
+    _family(lines, "response_cache_misses_total", "counter", "Промахи кэша ответов", [({}, cache["misses"])])
+    _family(lines, "response_cache_coalesced_total", "counter", "Запросы, дождавшиеся чужой загрузки",
+            [({}, cache["coalesced"])])
+
+    auth = auth_cache_stats()
+    _family(lines, "auth_cache_hits_total", "counter", "Попадания в кэши аутентификации",
+            [({"cache": cache_name}, values["hits"]) for cache_name, values in auth.items()])
+    _family(lines, "auth_cache_misses_total", "counter", "Промахи кэшей аутентификации",
+            [({"cache": cache_name}, values["misses"]) for cache_name, values in auth.items()])
+
+    limits = rate_limiter.stats()
+    _family(lines, "rate_limit_buckets", "gauge", "Корзины токенов лимитов в памяти", [({}, limits["buckets"])])
+    _family(lines, "rate_limit_rejected_total", "counter", "Запросы, отклонённые лимитами (429)",
+            [({"route": route}, count) for route, count in limits["rejected"].items()])
+
+    queue = rating_queue.stats()
+    _family(lines, "rating_queue_pending", "gauge", "Товары, ожидающие пересчёта рейтинга",
+            [({}, queue["pending"])])
+    _family(lines, "rating_queue_lag_seconds", "gauge", "Возраст самой старой пометки в очереди рейтингов",
+            [({}, queue["lag_seconds"])])
+    _family(lines, "rating_queue_failures_total", "counter", "Неудачные пересчёты пакетов рейтинга",
+            [({}, queue["failures"])])
+
+    return "\n".join(lines) + "\n"
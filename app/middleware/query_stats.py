@@ -0,0 +1,112 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """
+    Количество SQL-выражений и суммарное время их выполнения.
+    parent — объемлющий счётчик (например, count_queries вокруг HTTP-запроса):
+    выражения учитываются во всей цепочке.
+    """
+    count: int = 0
+    seconds: float = 0.0
+    parent: "QueryStats | None" = field(default=None, repr=False)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+def install_query_hooks(engine: AsyncEngine) -> None:
+    """
+    Подключает к engine счётчик выражений для текущего запроса (или блока count_queries).
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = _current_stats.get()
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats = stats.parent
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Считает SQL-выражения, выполненные внутри блока.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Хелпер для тестов: падает, если внутри блока выполнено больше limit выражений.
+
+        with assert_max_queries(1):
+            client.get("/products/1")
+    """
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= limit, f"Ожидалось не больше {limit} SQL-запросов, выполнено {stats.count}"
+
+
+class QueryStatsMiddleware:
+    """
+    Считает SQL-выражения и время в базе для каждого HTTP-запроса.
+    В режиме DEBUG добавляет заголовки X-DB-Queries и X-DB-Time (мс);
+    при превышении DB_QUERY_BUDGET пишет предупреждение в лог.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Счётчик запроса вложен во внешний (count_queries в тесте), а не заменяет его
+        stats = QueryStats(parent=_current_stats.get())
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(stats.count))
+                headers.append("X-DB-Time", f"{stats.seconds * 1000:.2f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            if stats.count > settings.DB_QUERY_BUDGET:
+                route = scope.get("route")
+                logger.warning("%s %s: %d SQL-запросов (бюджет %d), %.1f мс в базе",
+                               scope["method"], getattr(route, "path", scope["path"]),
+                               stats.count, settings.DB_QUERY_BUDGET, stats.seconds * 1000)
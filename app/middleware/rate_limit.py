@@ -0,0 +1,253 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal, Protocol
+
+import jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.auth import decode_token
+from app.config import settings
+from app.utils.kv_store import KeyValueStore
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """
+    Лимит "ip:10/60": не больше capacity запросов за period секунд с одного IP
+    (scope="ip") или от одного пользователя по токену (scope="user").
+    """
+    scope: Literal["ip", "user"]
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        try:
+            scope, _, rate = spec.partition(":")
+            capacity, _, period = rate.partition("/")
+            limit = cls(scope.strip(), int(capacity), float(period))  # type: ignore[arg-type]
+        except ValueError:
+            limit = None
+        if limit is None or limit.scope not in ("ip", "user") or limit.capacity < 1 or limit.period <= 0:
+            raise ValueError(f"Некорректный лимит {spec!r}, ожидается 'ip:10/60' или 'user:10/60'")
+        return limit
+
+
+class RateLimitBackend(Protocol):
+    """
+    Хранилище счётчиков лимитов. acquire списывает один запрос и возвращает 0,
+    если запрос разрешён, иначе — через сколько секунд можно повторить.
+    release возвращает запрос, списанный acquire, если его отклонил другой лимит.
+    """
+
+    async def acquire(self, key: str, limit: RateLimit) -> float: ...
+
+    async def release(self, key: str, limit: RateLimit) -> None: ...
+
+    def size(self) -> int: ...
+
+
+class TokenBucketBackend:
+    """
+    Корзины токенов в памяти процесса. Корзина пополняется со скоростью
+    capacity / period токенов в секунду, поэтому короткие всплески до capacity
+    разрешены, а средняя частота ограничена.
+
+    Корзины хранятся в OrderedDict в порядке последнего обращения: все операции O(1),
+    число корзин не превышает max_buckets, а простаивающие дольше idle_ttl удаляются
+    с начала словаря. Корзина, простоявшая дольше своего period, всё равно полна,
+    поэтому при idle_ttl не меньше наибольшего period вытеснение ничего не меняет.
+    """
+
+    def __init__(self, max_buckets: int, idle_ttl: float):
+        self.max_buckets = max_buckets
+        self.idle_ttl = idle_ttl
+        # ключ -> (токены, момент последнего обновления, monotonic)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        rate = limit.capacity / limit.period
+        bucket = self._buckets.pop(key, None)
+        tokens = limit.capacity if bucket is None else min(limit.capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        return retry_after
+
+    async def release(self, key: str, limit: RateLimit) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets[key] = (min(limit.capacity, bucket[0] + 1), bucket[1])
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets and (len(buckets) > self.max_buckets
+                           or next(iter(buckets.values()))[1] <= now - self.idle_ttl):
+            buckets.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class SharedStoreBackend:
+    """
+    Счётчики в общем хранилище (KeyValueStore): лимит общий для всех воркеров.
+    Используются фиксированные окна длиной period — один атомарный incr на запрос,
+    ключ окна живёт period секунд. На стыке окон возможен всплеск до 2 * capacity.
+    Подключается заменой rate_limiter.backend при старте приложения;
+    InMemoryKeyValueStore даёт ту же семантику в одном процессе для проверки.
+    """
+
+    def __init__(self, store: KeyValueStore, prefix: str = "rate-limit"):
+        self.store = store
+        self.prefix = prefix
+
+    def _window_key(self, key: str, limit: RateLimit, now: float) -> str:
+        return f"{self.prefix}:{key}:{limit.period:g}:{int(now // limit.period)}"
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = time.time()
+        count = await self.store.incr(self._window_key(key, limit, now), ttl=limit.period)
+        if count <= limit.capacity:
+            return 0.0
+        return (now // limit.period + 1) * limit.period - now
+
+    async def release(self, key: str, limit: RateLimit) -> None:
+        # Если окно уже сменилось и его ключ истёк, возвращать нечего
+        window_key = self._window_key(key, limit, time.time())
+        if await self.store.ttl(window_key) is not None:
+            await self.store.incr(window_key, amount=-1)
+
+    def size(self) -> int:
+        return 0
+
+
+class RateLimiter:
+    """
+    Лимиты по маршрутам: ключ правила — "МЕТОД /путь" (точное совпадение пути)
+    или "*" для всех остальных запросов.
+    """
+
+    def __init__(self, backend: RateLimitBackend, rules: dict[str, list[str]], enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.rules = {route: tuple(RateLimit.parse(spec) for spec in specs) for route, specs in rules.items()}
+        # правило -> число отклонённых запросов
+        self.rejected: dict[str, int] = {}
+
+    def limits_for(self, method: str, path: str) -> tuple[str, tuple[RateLimit, ...]]:
+        route = f"{method} {path}"
+        if route in self.rules:
+            return route, self.rules[route]
+        return "*", self.rules.get("*", ())
+
+    async def check(self, route: str, limits: tuple[RateLimit, ...], client_ip: str, user_id: int | None) -> float:
+        """
+        Списывает запрос со всех лимитов маршрута (см. limits_for).
+        Возвращает 0, если запрос разрешён, иначе Retry-After в секундах.
+        Отклонённый запрос не расходует остальные лимиты: уже списанное возвращается.
+        """
+        acquired: list[tuple[str, RateLimit]] = []
+        for limit in limits:
+            if limit.scope == "ip":
+                subject = f"ip:{client_ip}"
+            elif user_id is not None:
+                subject = f"user:{user_id}"
+            else:
+                # Анонимный запрос ограничивается только лимитами по IP
+                continue
+            key = f"{route}|{subject}"
+            retry_after = await self.backend.acquire(key, limit)
+            if retry_after:
+                for acquired_key, acquired_limit in acquired:
+                    await self.backend.release(acquired_key, acquired_limit)
+                self.rejected[route] = self.rejected.get(route, 0) + 1
+                return retry_after
+            acquired.append((key, limit))
+        return 0.0
+
+    def stats(self) -> dict:
+        return {"buckets": self.backend.size(), "rejected": dict(self.rejected)}
+
+
+def _client_ip(scope: Scope) -> str:
+    """
+    IP клиента: при RATE_LIMIT_TRUSTED_PROXIES = N — N-я запись с конца X-Forwarded-For
+    (адрес, с которого пришёл запрос к первому доверенному прокси), иначе адрес соединения.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        # Несколько заголовков X-Forwarded-For равносильны одному, склеенному через запятую
+        forwarded = [value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"]
+        entries = [entry.strip() for entry in ",".join(forwarded).split(",") if entry.strip()]
+        if len(entries) >= hops:
+            return entries[-hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _user_id(scope: Scope) -> int | None:
+    """
+    ID пользователя из Bearer-токена (проверенные токены берутся из кэша decode_token).
+    Невалидный токен не ошибка здесь — его отклонит сам эндпоинт.
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return decode_token(token).get("id")
+            except jwt.PyJWTError:
+                return None
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Ограничивает частоту запросов по IP и по пользователю до выполнения эндпоинта.
+    Отклонённый запрос получает 429 с заголовком Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: "RateLimiter | None" = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route, limits = self.limiter.limits_for(scope["method"], scope["path"])
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        # Токен разбирается, только если у маршрута есть лимит по пользователю
+        user_id = _user_id(scope) if any(limit.scope == "user" for limit in limits) else None
+        retry_after = await self.limiter.check(route, limits, _client_ip(scope), user_id)
+        if retry_after:
+            # Отклонённый запрос не доходит до маршрутизации: для метрик маршрутом служит ключ правила
+            scope["rate_limit_rule"] = route
+            response = JSONResponse(status_code=429,
+                                    content={"detail": "Слишком много запросов, повторите позже"},
+                                    headers={"Retry-After": str(math.ceil(retry_after))})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+rate_limiter = RateLimiter(
+    TokenBucketBackend(settings.RATE_LIMIT_MAX_BUCKETS, settings.RATE_LIMIT_IDLE_TTL),
+    settings.RATE_LIMIT_RULES,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,48 @@
+"""Add category materialized path
+
+Revision ID: 001911ef4625
+Revises: c3a56e9666d5
+Create Date: 2026-10-18 11:31:27.904152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '001911ef4625'
+down_revision: Union[str, Sequence[str], None] = 'c3a56e9666d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('path', sa.String(), server_default='', nullable=False))
+
+    # Строим пути существующих категорий обходом дерева от корней
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, '/' || id || '/' AS path
+            FROM categories
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, tree.path || c.id || '/'
+            FROM categories AS c
+            JOIN tree ON c.parent_id = tree.id
+        )
+        UPDATE categories
+        SET path = tree.path
+        FROM tree
+        WHERE categories.id = tree.id
+    """)
+    op.create_index('ix_categories_path', 'categories', ['path'], unique=False,
+                    postgresql_ops={'path': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_categories_path', table_name='categories')
+    op.drop_column('categories', 'path')
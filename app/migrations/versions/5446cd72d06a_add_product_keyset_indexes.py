@@ -0,0 +1,30 @@
+"""Add product keyset pagination indexes
+
+Revision ID: 5446cd72d06a
+Revises: beecb6c90ff2
+Create Date: 2026-10-18 10:12:41.512203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5446cd72d06a'
+down_revision: Union[str, Sequence[str], None] = 'beecb6c90ff2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_rating_id', 'products', ['rating', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_rating_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
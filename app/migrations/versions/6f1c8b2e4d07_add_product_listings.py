@@ -0,0 +1,81 @@
+"""Add product listings read model
+
+Revision ID: 6f1c8b2e4d07
+Revises: d5e2a9c71f38
+Create Date: 2026-10-18 19:02:37.164420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1c8b2e4d07'
+down_revision: Union[str, Sequence[str], None] = 'd5e2a9c71f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_listings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('image_url', sa.String(length=200), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('category_path', sa.String(), nullable=False),
+    sa.Column('is_visible', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Начальное заполнение: то же выражение, что и в app/utils/read_model.py
+    op.execute(
+        "INSERT INTO product_listings (id, name, description, price, image_url, stock, is_active, "
+        "category_id, seller_id, rating, version, category_path, is_visible) "
+        "SELECT p.id, p.name, p.description, p.price, p.image_url, p.stock, coalesce(p.is_active, false), "
+        "p.category_id, p.seller_id, coalesce(p.rating, 0), p.version, c.path, "
+        "p.is_active IS true AND NOT EXISTS (SELECT 1 FROM categories a "
+        "WHERE a.id = ANY (string_to_array(btrim(c.path, '/'), '/')::integer[]) AND a.is_active = false) "
+        "FROM products p JOIN categories c ON c.id = p.category_id"
+    )
+    op.create_index('ix_product_listings_visible_price_id', 'product_listings', ['price', 'id'], unique=False,
+                    postgresql_where=sa.text('is_visible'))
+    op.create_index('ix_product_listings_visible_rating_id', 'product_listings', ['rating', 'id'], unique=False,
+                    postgresql_where=sa.text('is_visible'))
+    op.create_index('ix_product_listings_visible_category_id_id', 'product_listings', ['category_id', 'id'],
+                    unique=False, postgresql_where=sa.text('is_visible'))
+    op.create_index('ix_product_listings_visible_category_path', 'product_listings', ['category_path'],
+                    unique=False, postgresql_ops={'category_path': 'varchar_pattern_ops'},
+                    postgresql_where=sa.text('is_visible'))
+    op.create_index('ix_product_listings_visible_seller_id_id', 'product_listings', ['seller_id', 'id'],
+                    unique=False, postgresql_where=sa.text('is_visible'))
+    # Списки и поиск читают product_listings: индексы сортировки products больше не используются.
+    # Пересборке поддерева категории нужны все товары категории, а не только активные
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_rating_id', table_name='products')
+    op.drop_index('ix_products_category_id_id', table_name='products', postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_category_id', table_name='products')
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_rating_id', 'products', ['rating', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.drop_index('ix_product_listings_visible_seller_id_id', table_name='product_listings')
+    op.drop_index('ix_product_listings_visible_category_path', table_name='product_listings')
+    op.drop_index('ix_product_listings_visible_category_id_id', table_name='product_listings')
+    op.drop_index('ix_product_listings_visible_rating_id', table_name='product_listings')
+    op.drop_index('ix_product_listings_visible_price_id', table_name='product_listings')
+    op.drop_table('product_listings')
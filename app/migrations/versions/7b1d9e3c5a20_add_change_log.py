@@ -0,0 +1,47 @@
+"""Add catalog change log
+
+Revision ID: 7b1d9e3c5a20
+Revises: e4a69d8da220
+Create Date: 2026-10-18 15:42:07.318904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1d9e3c5a20'
+down_revision: Union[str, Sequence[str], None] = 'e4a69d8da220'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_log',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('(pg_current_xact_id()::text)::bigint'), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_change_log_txid_id', 'change_log', ['txid', 'id'], unique=False)
+    op.create_index('ix_change_log_entity', 'change_log', ['entity', 'entity_id', 'txid'], unique=False)
+    op.create_table('change_log_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('compacted_through', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO change_log_state (id, compacted_through) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('change_log_state')
+    op.drop_index('ix_change_log_entity', table_name='change_log')
+    op.drop_index('ix_change_log_txid_id', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,35 @@
+"""Add in-stock product listing indexes
+
+Revision ID: 9a4d7e2b1c56
+Revises: 6f1c8b2e4d07
+Create Date: 2026-10-18 21:14:08.527193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d7e2b1c56'
+down_revision: Union[str, Sequence[str], None] = '6f1c8b2e4d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_product_listings_in_stock_id', 'product_listings', ['id'], unique=False,
+                    postgresql_where=sa.text('is_visible AND stock > 0'))
+    op.create_index('ix_product_listings_in_stock_price_id', 'product_listings', ['price', 'id'], unique=False,
+                    postgresql_where=sa.text('is_visible AND stock > 0'))
+    op.create_index('ix_product_listings_in_stock_rating_id', 'product_listings', ['rating', 'id'], unique=False,
+                    postgresql_where=sa.text('is_visible AND stock > 0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_listings_in_stock_rating_id', table_name='product_listings')
+    op.drop_index('ix_product_listings_in_stock_price_id', table_name='product_listings')
+    op.drop_index('ix_product_listings_in_stock_id', table_name='product_listings')
@@ -0,0 +1,55 @@
+"""Add stock reservations
+
+Revision ID: a83f0c2d9b14
+Revises: 7b1d9e3c5a20
+Create Date: 2026-10-18 16:20:44.907215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83f0c2d9b14'
+down_revision: Union[str, Sequence[str], None] = '7b1d9e3c5a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'idempotency_key', name='uq_reservations_user_idempotency_key')
+    )
+    op.create_index('ix_reservations_pending_expires_at', 'reservations', ['expires_at'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_table('reservation_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['reservation_id'], ['reservations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservation_items_reservation_id'), 'reservation_items', ['reservation_id'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reservation_items_reservation_id'), table_name='reservation_items')
+    op.drop_table('reservation_items')
+    op.drop_index('ix_reservations_pending_expires_at', table_name='reservations')
+    op.drop_table('reservations')
@@ -0,0 +1,60 @@
+"""Add product rating counters
+
+Revision ID: c3a56e9666d5
+Revises: 5446cd72d06a
+Create Date: 2026-10-18 10:48:03.227114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a56e9666d5'
+down_revision: Union[str, Sequence[str], None] = '5446cd72d06a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTER_COLUMNS = ['rating_sum', 'rating_count',
+                   'grade_1_count', 'grade_2_count', 'grade_3_count', 'grade_4_count', 'grade_5_count']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COUNTER_COLUMNS:
+        op.add_column('products', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем счётчики по существующим активным отзывам
+    op.execute("""
+        UPDATE products AS p
+        SET rating_sum = a.rating_sum,
+            rating_count = a.rating_count,
+            grade_1_count = a.grade_1_count,
+            grade_2_count = a.grade_2_count,
+            grade_3_count = a.grade_3_count,
+            grade_4_count = a.grade_4_count,
+            grade_5_count = a.grade_5_count,
+            rating = round(a.rating_sum::numeric / a.rating_count, 2)::double precision
+        FROM (
+            SELECT product_id,
+                   sum(grade) AS rating_sum,
+                   count(*) AS rating_count,
+                   count(*) FILTER (WHERE grade = 1) AS grade_1_count,
+                   count(*) FILTER (WHERE grade = 2) AS grade_2_count,
+                   count(*) FILTER (WHERE grade = 3) AS grade_3_count,
+                   count(*) FILTER (WHERE grade = 4) AS grade_4_count,
+                   count(*) FILTER (WHERE grade = 5) AS grade_5_count
+            FROM reviews
+            WHERE is_active
+            GROUP BY product_id
+        ) AS a
+        WHERE p.id = a.product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(COUNTER_COLUMNS):
+        op.drop_column('products', column)
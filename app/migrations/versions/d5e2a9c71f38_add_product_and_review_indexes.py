@@ -0,0 +1,70 @@
+"""Add product and review access path indexes
+
+Revision ID: d5e2a9c71f38
+Revises: a83f0c2d9b14
+Create Date: 2026-10-18 18:05:12.381946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2a9c71f38'
+down_revision: Union[str, Sequence[str], None] = 'a83f0c2d9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_seller_id', 'products', ['seller_id'], unique=False)
+    op.create_index('ix_reviews_product_id_comment_date_id', 'reviews',
+                    ['product_id', sa.text('comment_date DESC'), sa.text('id DESC')], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_reviews_comment_date_id', 'reviews',
+                    [sa.text('comment_date DESC'), sa.text('id DESC')], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    # Дубли, которые могла пропустить прежняя проверка перед INSERT: оставляем самый новый отзыв.
+    # Товары с дублями запоминаются, чтобы затем пересчитать их счётчики рейтинга.
+    duplicate = ("is_active AND EXISTS (SELECT 1 FROM reviews newer "
+                 "WHERE newer.is_active AND newer.user_id = reviews.user_id "
+                 "AND newer.product_id = reviews.product_id AND newer.id > reviews.id)")
+    op.execute(f"CREATE TEMPORARY TABLE deduped_products AS SELECT DISTINCT product_id FROM reviews WHERE {duplicate}")
+    op.execute(f"UPDATE reviews SET is_active = false WHERE {duplicate}")
+    # Счётчики пересчитываются по оставшимся активным отзывам одним UPDATE,
+    # как в rebuild_product_ratings (app/utils/rating.py)
+    op.execute(
+        "UPDATE products SET rating_sum = actual.rating_sum, rating_count = actual.rating_count, "
+        "grade_1_count = actual.grade_1_count, grade_2_count = actual.grade_2_count, "
+        "grade_3_count = actual.grade_3_count, grade_4_count = actual.grade_4_count, "
+        "grade_5_count = actual.grade_5_count, "
+        "rating = CASE WHEN actual.rating_count > 0 "
+        "THEN round(actual.rating_sum::numeric / actual.rating_count, 2)::float ELSE 0.0 END, "
+        "version = products.version + 1 "
+        "FROM (SELECT d.product_id, coalesce(sum(r.grade), 0) AS rating_sum, count(r.id) AS rating_count, "
+        "count(r.id) FILTER (WHERE r.grade = 1) AS grade_1_count, "
+        "count(r.id) FILTER (WHERE r.grade = 2) AS grade_2_count, "
+        "count(r.id) FILTER (WHERE r.grade = 3) AS grade_3_count, "
+        "count(r.id) FILTER (WHERE r.grade = 4) AS grade_4_count, "
+        "count(r.id) FILTER (WHERE r.grade = 5) AS grade_5_count "
+        "FROM deduped_products d LEFT JOIN reviews r ON r.product_id = d.product_id AND r.is_active "
+        "GROUP BY d.product_id) AS actual "
+        "WHERE products.id = actual.product_id"
+    )
+    op.execute("DROP TABLE deduped_products")
+    op.create_index('uq_reviews_user_id_product_id_active', 'reviews', ['user_id', 'product_id'], unique=True,
+                    postgresql_where=sa.text('is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_reviews_user_id_product_id_active', table_name='reviews')
+    op.drop_index('ix_reviews_comment_date_id', table_name='reviews')
+    op.drop_index('ix_reviews_product_id_comment_date_id', table_name='reviews')
+    op.drop_index('ix_products_seller_id', table_name='products')
+    op.drop_index('ix_products_category_id_id', table_name='products')
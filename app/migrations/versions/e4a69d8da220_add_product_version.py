@@ -0,0 +1,28 @@
+"""Add product row version for ETags
+
+Revision ID: e4a69d8da220
+Revises: f59b992b5e3d
+Create Date: 2026-10-18 13:05:19.640281
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a69d8da220'
+down_revision: Union[str, Sequence[str], None] = 'f59b992b5e3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'version')
@@ -0,0 +1,38 @@
+"""Add product full-text search
+
+Revision ID: f59b992b5e3d
+Revises: 001911ef4625
+Create Date: 2026-10-18 12:20:44.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f59b992b5e3d'
+down_revision: Union[str, Sequence[str], None] = '001911ef4625'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+                    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+    op.drop_column('products', 'search_vector')
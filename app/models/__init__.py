@@ -2,5 +2,9 @@ from .categories import Category
 from .products import Product
 from .users import User
 from .reviews import Review
+from .change_log import ChangeLog, ChangeLogState
+from .reservations import Reservation, ReservationItem
+from .product_listings import ProductListing
 
-__all__ = ["Category", "Product", "User", "Review"]
\ No newline at end of file
+__all__ = ["Category", "Product", "User", "Review", "ChangeLog", "ChangeLogState",
+           "Reservation", "ReservationItem", "ProductListing"]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from typing import Optional
-from sqlalchemy import ForeignKey, String, Boolean
+from sqlalchemy import ForeignKey, String, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -7,11 +7,17 @@ from app.database import Base
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        # Индекс для поиска поддерева по префиксу пути (LIKE '/1/4/%')
+        Index("ix_categories_path", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     parent_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Материализованный путь от корня: '/1/4/9/' (см. app/utils/category_tree.py)
+    path: Mapped[str] = mapped_column(String, nullable=False, default="", server_default="")
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="category")
 
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ChangeLog(Base):
+    """
+    Журнал изменений каталога для потребителей дельт (GET /changes).
+    txid — номер транзакции, записавшей изменение; он служит версией изменения.
+    """
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Чтение журнала по версии и поиск дублей одной сущности при компактизации
+        Index("ix_change_log_txid_id", "txid", "id"),
+        Index("ix_change_log_entity", "entity", "entity_id", "txid"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    txid: Mapped[int] = mapped_column(BigInteger, nullable=False,
+                                      server_default=text("(pg_current_xact_id()::text)::bigint"))
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class ChangeLogState(Base):
+    """
+    Единственная строка с границей компактизации: изменения с версией не больше
+    compacted_through удалены по сроку хранения.
+    """
+    __tablename__ = "change_log_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    compacted_through: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
@@ -0,0 +1,46 @@
+from sqlalchemy import Boolean, Float, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ProductListing(Base):
+    """
+    Денормализованная модель чтения каталога: колонки товара, путь его категории
+    и итоговая видимость (товар активен, его категория и все её предки активны).
+    Обновляется в тех же транзакциях, что и товары и категории (см. app/utils/read_model.py),
+    поэтому списки товаров читают одну таблицу без проверки категорий.
+    """
+    __tablename__ = "product_listings"
+    __table_args__ = (
+        # Курсорная пагинация видимых товаров по (колонка сортировки, id)
+        Index("ix_product_listings_visible_price_id", "price", "id", postgresql_where=text("is_visible")),
+        Index("ix_product_listings_visible_rating_id", "rating", "id", postgresql_where=text("is_visible")),
+        # То же для списка по умолчанию (in_stock=true): товары не в наличии не попадают в индекс
+        # и не просматриваются впустую при keyset-сканировании
+        Index("ix_product_listings_in_stock_id", "id", postgresql_where=text("is_visible AND stock > 0")),
+        Index("ix_product_listings_in_stock_price_id", "price", "id",
+              postgresql_where=text("is_visible AND stock > 0")),
+        Index("ix_product_listings_in_stock_rating_id", "rating", "id",
+              postgresql_where=text("is_visible AND stock > 0")),
+        # Товары категории, поддерева категории (LIKE '/1/4/%') и продавца
+        Index("ix_product_listings_visible_category_id_id", "category_id", "id",
+              postgresql_where=text("is_visible")),
+        Index("ix_product_listings_visible_category_path", "category_path",
+              postgresql_ops={"category_path": "varchar_pattern_ops"}, postgresql_where=text("is_visible")),
+        Index("ix_product_listings_visible_seller_id_id", "seller_id", "id", postgresql_where=text("is_visible")),
+    )
+
+    id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    description: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    image_url: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    seller_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    rating: Mapped[float] = mapped_column(Float, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    category_path: Mapped[str] = mapped_column(String, nullable=False)
+    is_visible: Mapped[bool] = mapped_column(Boolean, nullable=False)
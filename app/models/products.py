@@ -1,4 +1,5 @@
-from sqlalchemy import String, Boolean, Float, Integer, ForeignKey
+from sqlalchemy import String, Boolean, Float, Integer, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -6,6 +7,14 @@ from app.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Списки и поиск читают модель чтения product_listings со своими индексами.
+        # Товары категорий поддерева (все, включая неактивные) — для её пересборки
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_seller_id", "seller_id"),
+        # Полнотекстовый поиск по названию и описанию
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -17,6 +26,25 @@ class Product(Base):
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     rating: Mapped[float] = mapped_column(Float, default=0.0)
+    # Версия строки для ETag: увеличивается при каждом изменении товара и его отзывов
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+
+    # Счётчики для инкрементального пересчёта рейтинга (см. app/utils/rating.py)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_1_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_2_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_3_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_4_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_5_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # Поисковый вектор вычисляется самой базой; название весит больше описания
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed("setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+                 "setweight(to_tsvector('russian', coalesce(description, '')), 'B')", persisted=True),
+        deferred=True,
+    )
 
     category: Mapped["Category"] = relationship(back_populates="products")
     seller = relationship("User", back_populates="products")
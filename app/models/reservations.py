@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+
+class Reservation(Base):
+    """
+    Резервирование товаров покупателем. Остаток списывается при создании;
+    до подтверждения резерв можно освободить, просроченные резервы освобождает фоновая задача.
+    """
+    __tablename__ = "reservations"
+    __table_args__ = (
+        # Повтор запроса с тем же Idempotency-Key возвращает уже созданный резерв
+        UniqueConstraint("user_id", "idempotency_key", name="uq_reservations_user_idempotency_key"),
+        # Поиск просроченных резервов
+        Index("ix_reservations_pending_expires_at", "expires_at",
+              postgresql_where=text("status = 'pending'")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    idempotency_key: Mapped[str] = mapped_column(String(100), nullable=False)
+    # pending, confirmed, released или expired
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", server_default="pending")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    items: Mapped[list["ReservationItem"]] = relationship(back_populates="reservation", lazy="selectin",
+                                                          order_by="ReservationItem.product_id")
+
+
+class ReservationItem(Base):
+    __tablename__ = "reservation_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    reservation_id: Mapped[int] = mapped_column(ForeignKey("reservations.id"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Цена на момент резервирования
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    reservation: Mapped["Reservation"] = relationship(back_populates="items")
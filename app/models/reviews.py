@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import Integer, String, Boolean, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -6,6 +6,16 @@ from app.database import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Курсорная пагинация отзывов товара и общей ленты: (comment_date, id) по убыванию
+        Index("ix_reviews_product_id_comment_date_id", "product_id", text("comment_date DESC"), text("id DESC"),
+              postgresql_where=text("is_active")),
+        Index("ix_reviews_comment_date_id", text("comment_date DESC"), text("id DESC"),
+              postgresql_where=text("is_active")),
+        # Не больше одного активного отзыва пользователя на товар
+        Index("uq_reviews_user_id_product_id_active", "user_id", "product_id", unique=True,
+              postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.categories import Category as CategoryModel
 from app.schemas import Category as CategorySchema, CategoryCreate
 from app.db_depends import get_async_db
+from app.utils.category_cache import category_cache
+from app.utils.change_log import record_change
+from app.utils.category_tree import child_path, lock_category_tree, move_category
+from app.utils.read_model import refresh_category_listings
+from app.utils.etag import etag_matches, make_etag, not_modified, set_cache_headers
+from app.utils.export import export_response
+from app.utils.response_cache import response_cache
 
 # Маршрутизатор
 router = APIRouter(
@@ -14,13 +22,29 @@ router = APIRouter(
 
 
 @router.get("/", response_model=list[CategorySchema])
-async def get_all_categories(db: AsyncSession = Depends(get_async_db)):
+async def get_all_categories(request: Request, response: Response):
     """
     Возвращает список всех категорий товаров.
+    Поддерживает условный запрос по ETag (If-None-Match -> 304).
     """
-    result = await db.scalars(select(CategoryModel).where(CategoryModel.is_active == True))
-    categories = result.all()
-    return categories
+    snapshot = await category_cache.get()
+    etag = make_etag("c", snapshot.etag)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CATEGORY_CACHE_CONTROL)
+    set_cache_headers(response, etag, settings.CATEGORY_CACHE_CONTROL)
+    return snapshot.active
+
+
+@router.get("/export")
+async def export_categories(
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$",
+                                   description="Формат выгрузки: ndjson или csv")):
+    """
+    Потоково выгружает все активные категории в NDJSON или CSV.
+    """
+    stmt = select(*[getattr(CategoryModel, name) for name in CategorySchema.model_fields]).where(
+        CategoryModel.is_active == True)
+    return export_response(stmt.order_by(CategoryModel.id), export_format, "categories")
 
 
 @router.post("/", response_model=CategorySchema, status_code=status.HTTP_201_CREATED)
@@ -29,7 +53,10 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
     Создаёт новую категорию.
     """
     # Проверка существования parent_id, если указан
+    parent = None
     if category.parent_id is not None:
+        # Путь родителя не должен измениться, пока создаётся дочерняя категория
+        await lock_category_tree(db)
         stmt = select(CategoryModel).where(CategoryModel.id == category.parent_id,
                                            CategoryModel.is_active == True)
         result = await db.scalars(stmt)
@@ -40,7 +67,12 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
     # Создание новой категории
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
+    await db.flush()
+    db_category.path = child_path(parent, db_category.id)
+    await record_change(db, "category", db_category.id, "create")
     await db.commit()
+    category_cache.invalidate()
+    await response_cache.invalidate("products")
     await db.refresh(db_category)
     return db_category
 
@@ -50,6 +82,9 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
     """
     Обновляет категорию по её ID.
     """
+    # Перемещения в дереве выполняются строго по одному
+    await lock_category_tree(db, exclusive=True)
+
     stmt = select(CategoryModel).where(CategoryModel.id == category_id,
                                        CategoryModel.is_active == True)
     result = await db.scalars(stmt)
@@ -57,6 +92,7 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
     if db_category is None:
         raise HTTPException(status_code=404, detail="Категория не найдена")
 
+    parent = None
     if category.parent_id is not None:
         parent_stmt = select(CategoryModel).where(CategoryModel.id == category.parent_id,
                                                   CategoryModel.is_active == True)
@@ -66,12 +102,22 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
             raise HTTPException(status_code=404, detail="Родительская категория не найдена")
 
     update_data = category.model_dump(exclude_unset=True)
+    moved = "parent_id" in update_data and update_data["parent_id"] != db_category.parent_id
+    if moved:
+        await move_category(db, db_category, parent)
+
     await db.execute(
         update(CategoryModel).
         where(CategoryModel.id == category_id).
         values(**update_data)
     )
+    await record_change(db, "category", category_id, "update")
+    if moved:
+        # Новые предки могут быть выключены — пересчитываем видимость товаров поддерева
+        await refresh_category_listings(db, child_path(parent, category_id))
     await db.commit()
+    category_cache.invalidate()
+    await response_cache.invalidate("products")
     return db_category
 
 
@@ -80,6 +126,9 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_async
     """
     Удаляет категорию по её ID.
     """
+    # Видимость товаров поддерева пересчитывается под той же блокировкой, что и перемещения
+    await lock_category_tree(db, exclusive=True)
+
     stmt = select(CategoryModel).where(CategoryModel.id == category_id, CategoryModel.is_active == True)
     db_category = await db.scalars(stmt)
     category = db_category.first()
@@ -89,5 +138,9 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_async
     await db.execute(update(CategoryModel)
                      .where(CategoryModel.id == category_id)
                      .values(is_active=False))
+    await record_change(db, "category", category_id, "delete")
+    await refresh_category_listings(db, category.path)
     await db.commit()
+    category_cache.invalidate()
+    await response_cache.invalidate("products")
     return db_category
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import orjson
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_read_session_maker
+from app.db_depends import get_async_read_db
+from app.schemas import ChangeList
+from app.utils.change_log import change_log_head, check_retained, fetch_changes
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+)
+
+
+@router.get("/", response_model=ChangeList)
+async def get_changes(
+        since: int | None = Query(None, ge=0, description="Версия, после которой нужны изменения. "
+                                                          "Без параметра возвращается текущая версия"),
+        limit: int = Query(settings.CHANGE_FEED_BATCH_SIZE, ge=1, le=5000, description="Размер пакета"),
+        db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает изменения товаров, категорий и отзывов после версии since.
+    Если изменения уже удалены компактизацией — 410, нужна полная выгрузка.
+    """
+    if since is None:
+        return {"items": [], "next_since": await change_log_head(db)}
+    await check_retained(db, since)
+    rows, next_since = await fetch_changes(db, since, limit)
+    return {"items": [row._asdict() for row in rows], "next_since": next_since}
+
+
+def _sse_events(rows) -> bytes:
+    """
+    События SSE для пакета изменений. id ставится только на последнем событии
+    транзакции, чтобы переподключение с Last-Event-ID не потеряло её хвост.
+    """
+    chunks = []
+    for index, row in enumerate(rows):
+        data = orjson.dumps(row._asdict()).decode()
+        last_in_version = index + 1 == len(rows) or rows[index + 1].version != row.version
+        event_id = f"id: {row.version}\n" if last_in_version else ""
+        chunks.append(f"{event_id}event: change\ndata: {data}\n\n")
+    return "".join(chunks).encode()
+
+
+@router.get("/stream")
+async def stream_changes(
+        request: Request,
+        since: int | None = Query(None, ge=0, description="Версия, после которой нужны изменения"),
+        last_event_id: int | None = Header(None, ge=0, description="Последний полученный id при переподключении")):
+    """
+    Поток изменений в формате Server-Sent Events. Без since поток начинается с текущей версии.
+    """
+    async with async_read_session_maker() as db:
+        position = last_event_id if last_event_id is not None else since
+        if position is None:
+            position = await change_log_head(db)
+        else:
+            await check_retained(db, position)
+
+    async def events():
+        nonlocal position
+        last_sent = time.monotonic()
+        yield b"retry: 3000\n\n"
+        while not await request.is_disconnected():
+            async with async_read_session_maker() as db:
+                rows, position = await fetch_changes(db, position, settings.CHANGE_FEED_BATCH_SIZE)
+            if rows:
+                yield _sse_events(rows)
+                last_sent = time.monotonic()
+                continue
+            if time.monotonic() - last_sent >= settings.CHANGE_FEED_HEARTBEAT:
+                yield b": ping\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(settings.CHANGE_FEED_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
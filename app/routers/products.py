@@ -1,13 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, func, cast, any_, bindparam, Float, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.users import User as UserModel
+from app.models.product_listings import ProductListing
 from app.models.products import Product as ProductModel
-from app.models.categories import Category as CategoryModel
-from app.schemas import Product as ProductSchema, ProductCreate
-from app.auth import get_current_seller
-from app.db_depends import get_async_db
+from app.config import settings
+from app.schemas import (Product as ProductSchema, ProductCreate, ProductList, ProductImportResult, RatingSummary,
+                         ProductBatch, ProductBatchRequest, MAX_DB_ID)
+from app.auth import Principal, get_current_seller
+from app.db_depends import get_async_db, get_async_read_db
+from app.utils.category_cache import category_cache
+from app.utils.change_log import record_change, record_changes
+from app.utils.etag import etag_matches, make_etag, not_modified, set_cache_headers
+from app.utils.export import export_response
+from app.utils.fields import fields_query, parse_fields, projected_model
+from app.utils.import_stream import iter_csv_rows, iter_ndjson_rows
+from app.utils.pagination import apply_keyset, decode_cursor, encode_cursor, is_cursor_number, query_digest
+from app.utils.rating import GRADES
+from app.utils.read_model import refresh_product_listings
+from app.utils.response_cache import CachedResponse, cache_key, product_tag, response_cache
+from app.utils.serialization import RowSerializer
 
 router = APIRouter(
     prefix="/products",
@@ -15,144 +30,470 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=list[ProductSchema])
-async def get_all_products(db: AsyncSession = Depends(get_async_db)):
+# Чтения каталога идут из модели чтения product_listings (см. app/utils/read_model.py):
+# видимость товара с учётом категорий уже посчитана, JOIN и снимок категорий не нужны
+_product_rows = RowSerializer(ProductSchema, ProductListing)
+
+# Колонки, по которым разрешена сортировка списка товаров.
+# Для каждой есть составной индекс (колонка, id) по видимым товарам и по видимым товарам в наличии,
+# см. модель ProductListing.
+SORT_COLUMNS = {
+    "id": ProductListing.id,
+    "price": ProductListing.price,
+    "rating": ProductListing.rating,
+}
+
+
+@router.get("/", response_model=ProductList)
+async def get_all_products(
+        request: Request,
+        limit: int = Query(20, ge=1, le=100, description="Количество товаров на странице"),
+        cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+        sort: str = Query("id", pattern="^-?(id|price|rating)$",
+                          description="Поле сортировки: id, price или rating; префикс '-' — по убыванию"),
+        min_price: float | None = Query(None, ge=0, description="Минимальная цена"),
+        max_price: float | None = Query(None, ge=0, description="Максимальная цена"),
+        category_id: int | None = Query(None, description="ID категории"),
+        min_rating: float | None = Query(None, ge=0, le=5, description="Минимальный рейтинг"),
+        in_stock: bool = Query(True, description="Только товары в наличии"),
+        seller_id: int | None = Query(None, description="ID продавца"),
+        fields: str | None = fields_query(ProductSchema),
+        db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает страницу активных товаров с фильтрами и курсорной пагинацией.
+    С fields= выбираются и отдаются только указанные колонки.
+    """
+    serializer = _product_rows.project(parse_fields(fields, ProductSchema))
+
+    async def load() -> CachedResponse:
+        rows, next_cursor = await _load_product_page(
+            db, serializer, limit, cursor, sort, min_price, max_price, category_id, min_rating, in_stock, seller_id)
+        return CachedResponse(orjson.dumps({"items": serializer.items(rows), "next_cursor": next_cursor}))
+
+    cached = await response_cache.get_or_load("products", cache_key(request), load)
+    return cached.to_response()
+
+
+async def _load_product_page(db: AsyncSession, serializer: RowSerializer, limit: int, cursor: str | None,
+                             sort: str, min_price: float | None, max_price: float | None, category_id: int | None,
+                             min_rating: float | None, in_stock: bool, seller_id: int | None):
+    """
+    Загружает страницу товаров для get_all_products: (строки с колонками serializer,
+    курсор следующей страницы). Колонка сортировки выбирается всегда — она нужна для курсора.
+    """
+    descending = sort.startswith("-")
+    sort_field = sort.lstrip("-")
+    sort_column = SORT_COLUMNS[sort_field]
+
+    after = None
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        if (payload.get("s") != sort or not is_cursor_number(payload.get("id"), integer=True)
+                or not is_cursor_number(payload.get("v"), integer=sort_field == "id")):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Курсор не соответствует параметрам сортировки")
+        after = (payload["v"], payload["id"])
+
+    stmt = select(*serializer.select_columns(sort_column)).where(ProductListing.is_visible == True)
+    if in_stock:
+        stmt = stmt.where(ProductListing.stock > 0)
+    if min_price is not None:
+        stmt = stmt.where(ProductListing.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(ProductListing.price <= max_price)
+    if category_id is not None:
+        stmt = stmt.where(ProductListing.category_id == category_id)
+    if min_rating is not None:
+        stmt = stmt.where(ProductListing.rating >= min_rating)
+    if seller_id is not None:
+        stmt = stmt.where(ProductListing.seller_id == seller_id)
+
+    stmt = apply_keyset(stmt, sort_column, ProductListing.id, descending, after).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"s": sort, "v": getattr(last, sort_field), "id": last.id})
+    return rows, next_cursor
+
+
+@router.get("/export")
+async def export_products(
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$",
+                                   description="Формат выгрузки: ndjson или csv"),
+        db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Потоково выгружает все активные товары активных категорий в NDJSON или CSV.
+    """
+    stmt = select(*_product_rows.columns).where(ProductListing.is_visible == True)
+    return export_response(stmt.order_by(ProductListing.id), export_format, "products")
+
+
+@router.get("/search", response_model=ProductList)
+async def search_products(
+        q: str = Query(min_length=2, max_length=200, description="Поисковый запрос"),
+        limit: int = Query(20, ge=1, le=100, description="Количество товаров на странице"),
+        cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+        in_stock: bool = Query(True, description="Только товары в наличии"),
+        db: AsyncSession = Depends(get_async_read_db)):
     """
-    Возвращает список всех товаров.
+    Полнотекстовый поиск активных товаров по названию и описанию.
+    Результаты упорядочены по релевантности с учётом рейтинга товара.
     """
-    result = await db.scalars(
-        select(ProductModel).join(CategoryModel).where(ProductModel.is_active == True,
-                                                       CategoryModel.is_active == True,
-                                                       ProductModel.stock > 0))
+    after = None
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        # Курсор привязан к тексту запроса: позиция по релевантности имеет смысл только для него
+        if (payload.get("s") != "search" or payload.get("q") != query_digest(q)
+                or not is_cursor_number(payload.get("id"), integer=True)
+                or not is_cursor_number(payload.get("v"))):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Курсор не соответствует параметрам поиска")
+        after = (payload["v"], payload["id"])
+
+    # Релевантность нормирована в [0, 1); рейтинг 5.0 удваивает её
+    query = func.websearch_to_tsquery("russian", q)
+    score = cast(func.ts_rank_cd(ProductModel.search_vector, query, 32), Float) * (1 + ProductModel.rating / 5.0)
+
+    # GIN-индекс поиска — в products, видимость с учётом всех предков категории — в модели чтения
+    stmt = (select(ProductModel, score)
+            .join(ProductListing, ProductListing.id == ProductModel.id)
+            .where(ProductModel.search_vector.bool_op("@@")(query), ProductListing.is_visible == True))
+    if in_stock:
+        stmt = stmt.where(ProductListing.stock > 0)
+
+    stmt = apply_keyset(stmt, score, ProductModel.id, True, after).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
 
-    return result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_product, last_score = rows[-1]
+        next_cursor = encode_cursor({"s": "search", "q": query_digest(q), "v": last_score, "id": last_product.id})
+    return {"items": [product for product, _ in rows], "next_cursor": next_cursor}
+
+
+async def _load_product_batch(db: AsyncSession, ids: list[int], fields: str | None) -> Response:
+    """
+    Товары по списку ID одним запросом по первичному ключу. Массив передаётся
+    одним параметром (id = ANY(:ids)), поэтому подготовленное выражение одно
+    для любого числа ID.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Не больше {settings.PRODUCT_BATCH_MAX_IDS} ID в одном запросе")
+    # ID уходят в базу массивом integer[]: значение вне диапазона — ошибка драйвера и 500
+    if any(not 1 <= product_id <= MAX_DB_ID for product_id in ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"ID товаров должны быть от 1 до {MAX_DB_ID}")
+
+    serializer = _product_rows.project(parse_fields(fields, ProductSchema))
+    rows = (await db.execute(
+        select(*serializer.columns).where(
+            ProductListing.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+            ProductListing.is_visible == True)
+    )).all()
+    found = {row.id: row for row in rows}
+    content = orjson.dumps({
+        "items": serializer.items(found[product_id] for product_id in ids if product_id in found),
+        "missing": [product_id for product_id in ids if product_id not in found],
+    })
+    return Response(content=content, media_type="application/json")
+
+
+@router.get("/batch", response_model=ProductBatch)
+async def get_products_batch(
+        ids: str = Query(pattern=r"^\s*\d+\s*(,\s*\d+\s*)*$", description="ID товаров через запятую"),
+        fields: str | None = fields_query(ProductSchema),
+        db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает несколько товаров по списку ID одним запросом к базе.
+    Порядок ответа совпадает с порядком ID; ненайденные ID перечислены в missing.
+    """
+    return await _load_product_batch(db, [int(product_id) for product_id in ids.split(",")], fields)
+
+
+@router.post("/batch", response_model=ProductBatch)
+async def post_products_batch(request_data: ProductBatchRequest,
+                              fields: str | None = fields_query(ProductSchema),
+                              db: AsyncSession = Depends(get_async_read_db)):
+    """
+    То же, что GET /products/batch, для длинных списков ID в теле запроса.
+    """
+    return await _load_product_batch(db, request_data.ids, fields)
 
 
 @router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
 async def create_product(product: ProductCreate,
                          db: AsyncSession = Depends(get_async_db),
-                         current_user: UserModel = Depends(get_current_seller)):
+                         current_user: Principal = Depends(get_current_seller)):
     """
     Создаёт новый товар.
     """
-    category_result = await db.scalars(select(CategoryModel).where(CategoryModel.id == product.category_id,
-                                                                   CategoryModel.is_active == True))
-    if not category_result.first():
+    snapshot = await category_cache.get()
+    if not snapshot.is_active(product.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Категория не найдена или не активна")
     db_product = ProductModel(**product.model_dump(), seller_id=current_user.id)
     db.add(db_product)
+    # id и значения по умолчанию возвращаются самим INSERT, отдельный refresh не нужен
+    await db.flush()
+    await record_change(db, "product", db_product.id, "create")
+    await refresh_product_listings(db, [db_product.id])
     await db.commit()
-    await db.refresh(db_product)
+    await response_cache.invalidate("products")
     return db_product
 
 
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                     for error in exc.errors(include_url=False))
+
+
+@router.post("/import", response_model=ProductImportResult)
+async def import_products(request: Request,
+                          db: AsyncSession = Depends(get_async_db),
+                          current_user: Principal = Depends(get_current_seller)):
+    """
+    Массово импортирует товары продавца из потока NDJSON (application/x-ndjson)
+    или CSV с заголовком (text/csv). Строки проверяются по мере поступления и
+    вставляются пакетами по PRODUCT_IMPORT_BATCH_SIZE; каждый пакет фиксируется сразу.
+    Некорректные строки пропускаются и перечисляются в ответе.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+        rows = iter_ndjson_rows(request.stream(), settings.PRODUCT_IMPORT_MAX_LINE_LENGTH)
+    elif content_type == "text/csv":
+        rows = iter_csv_rows(request.stream(), settings.PRODUCT_IMPORT_MAX_LINE_LENGTH)
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Поддерживаются только application/x-ndjson и text/csv")
+
+    snapshot = await category_cache.get()
+    batch: list[dict] = []
+    errors: list[dict] = []
+    inserted = failed = 0
+
+    async for row_number, data, error in rows:
+        if error is None:
+            try:
+                product = ProductCreate.model_validate(data)
+            except ValidationError as exc:
+                error = _format_validation_error(exc)
+            else:
+                if not snapshot.is_active(product.category_id):
+                    error = "Категория не найдена или не активна"
+        if error is not None:
+            failed += 1
+            if len(errors) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+                errors.append({"row": row_number, "detail": error})
+            continue
+
+        batch.append({**product.model_dump(), "seller_id": current_user.id})
+        if len(batch) >= settings.PRODUCT_IMPORT_BATCH_SIZE:
+            # Многострочный INSERT пакетом; значения по умолчанию подставляет SQLAlchemy
+            await _insert_import_batch(db, batch)
+            await db.commit()
+            inserted += len(batch)
+            batch = []
+
+    if batch:
+        await _insert_import_batch(db, batch)
+        await db.commit()
+        inserted += len(batch)
+
+    if inserted:
+        await response_cache.invalidate("products")
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+
+async def _insert_import_batch(db: AsyncSession, batch: list[dict]) -> None:
+    products_table = ProductModel.__table__
+    product_ids = (await db.scalars(insert(products_table).returning(products_table.c.id), batch)).all()
+    await record_changes(db, "product", product_ids, "create")
+    await refresh_product_listings(db, product_ids)
+
+
 @router.get("/category/{category_id}", response_model=list[ProductSchema])
-async def get_products_by_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_products_by_category(
+        request: Request,
+        category_id: int,
+        include_descendants: bool = Query(False, description="Включить товары всех дочерних категорий"),
+        fields: str | None = fields_query(ProductSchema),
+        db: AsyncSession = Depends(get_async_read_db)):
     """
     Возвращает список активных товаров в указанной категории по её ID.
+    С include_descendants=true — также товары всех её подкатегорий.
     """
-    # Проверяем, существует ли активная категория
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == category_id,
-                                    CategoryModel.is_active == True))
-    category = category_result.first()
-    if not category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="Category not found or inactive")
+    serializer = _product_rows.project(parse_fields(fields, ProductSchema))
 
-    # Получаем активные товары в категории
-    products_result = await db.scalars(
-        select(ProductModel).where(ProductModel.category_id == category_id,
-                                   ProductModel.is_active == True))
-    return products_result.all()
+    async def load() -> CachedResponse:
+        # Проверяем, существует ли активная категория
+        snapshot = await category_cache.get()
+        if not snapshot.is_active(category_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Category not found or inactive")
+
+        # Видимые товары категории или всего её поддерева (по префиксу пути категории)
+        if include_descendants:
+            in_category = ProductListing.category_path.like(f"{snapshot.get(category_id).path}%")
+        else:
+            in_category = ProductListing.category_id == category_id
+        rows = (await db.execute(
+            select(*serializer.columns).where(in_category, ProductListing.is_visible == True))).all()
+        return CachedResponse(serializer.dumps(rows))
+
+    cached = await response_cache.get_or_load("products", cache_key(request), load)
+    return cached.to_response()
 
 
 @router.get("/{product_id}", response_model=ProductSchema)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product(product_id: int, request: Request,
+                      fields: str | None = fields_query(ProductSchema),
+                      db: AsyncSession = Depends(get_async_read_db)):
     """
     Возвращает детальную информацию о товаре по его ID.
+    Поддерживает условный запрос по ETag (If-None-Match -> 304).
+    Безусловные запросы обслуживаются из кэша ответов.
+    С fields= выбираются и отдаются только указанные колонки.
     """
-    product_result = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id,
-                                   ProductModel.is_active == True))
-    product = product_result.first()
-    if not product:
+    serializer = _product_rows.project(parse_fields(fields, ProductSchema))
+    response_model = projected_model(ProductSchema, serializer.fields)
+
+    # Для условного запроса сначала читаем только версию строки
+    if request.headers.get("if-none-match"):
+        version = await db.scalar(
+            select(ProductListing.version).where(ProductListing.id == product_id,
+                                                 ProductListing.is_visible == True))
+        if version is not None:
+            etag = make_etag("p", product_id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag, settings.PRODUCT_CACHE_CONTROL)
+
+    async def load() -> CachedResponse:
+        product = (await db.execute(
+            select(*serializer.select_columns(ProductListing.is_active, ProductListing.is_visible,
+                                              ProductListing.version))
+            .where(ProductListing.id == product_id)
+        )).first()
+        if not product or not product.is_active:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Продукт не найден или не активен")
+
+        if not product.is_visible:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Категория не найдена или не активна")
+        return CachedResponse(response_model.model_validate(product).model_dump_json().encode(),
+                              make_etag("p", product.id, product.version))
+
+    cached = await response_cache.get_or_load("products", cache_key(request), load, tags=[product_tag(product_id)])
+    return cached.to_response(settings.PRODUCT_CACHE_CONTROL)
+
+
+@router.get("/{product_id}/rating-summary", response_model=RatingSummary)
+async def get_rating_summary(product_id: int, request: Request, response: Response,
+                             db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает количество отзывов, среднюю оценку и распределение оценок 1–5.
+    Данные берутся из счётчиков товара, которые обновляются вместе с отзывами,
+    поэтому таблица отзывов при запросе не агрегируется.
+    """
+    row = (await db.execute(
+        select(ProductModel.version, ProductModel.rating, ProductModel.rating_count,
+               *[getattr(ProductModel, f"grade_{grade}_count") for grade in GRADES])
+        .join(ProductListing, ProductListing.id == ProductModel.id)
+        .where(ProductModel.id == product_id, ProductListing.is_visible == True)
+    )).first()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Продукт не найден или не активен")
 
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id,
-                                    CategoryModel.is_active == True))
-    category = category_result.first()
-    if not category:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Категория не найдена или не активна")
-    return product
+    etag = make_etag("rs", product_id, row.version)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.REVIEW_CACHE_CONTROL)
+    set_cache_headers(response, etag, settings.REVIEW_CACHE_CONTROL)
+    return {
+        "product_id": product_id,
+        "count": row.rating_count,
+        "average": row.rating,
+        "distribution": {grade: getattr(row, f"grade_{grade}_count") for grade in GRADES},
+    }
+
+
+async def _raise_not_updated(db: AsyncSession, product_id: int, current_user: Principal,
+                             not_found_detail: str, forbidden_detail: str) -> None:
+    """
+    Условный UPDATE не затронул ни одной строки: выясняет причину (404 или 403).
+    Дополнительный запрос выполняется только на этом редком пути.
+    """
+    seller_id = await db.scalar(select(ProductModel.seller_id).where(ProductModel.id == product_id,
+                                                                     ProductModel.is_active == True))
+    if seller_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden_detail)
 
 
 @router.put("/{product_id}", response_model=ProductSchema)
 async def update_product(product_id: int, product: ProductCreate,
                          db: AsyncSession = Depends(get_async_db),
-                         current_user: UserModel = Depends(get_current_seller)):
+                         current_user: Principal = Depends(get_current_seller)):
     """
     Обновляет товар по его ID.
+    Проверка владельца и обновление выполняются одним UPDATE ... RETURNING.
     """
-    # Проверяем, существует ли товар
-    product_result = await db.scalars(select(ProductModel).where(ProductModel.id == product_id,
-                                                                 ProductModel.is_active == True))
-    db_product = product_result.first()
-    if not db_product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    if db_product.seller_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Вы можете обновлять только свои собственные продукты")
-
-    # Проверяем, существует ли активная категория
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
+    db_product = await db.scalar(
+        update(ProductModel)
+        .where(ProductModel.id == product_id,
+               ProductModel.is_active == True,
+               ProductModel.seller_id == current_user.id)
+        .values(**product.model_dump(), version=ProductModel.version + 1)
+        .returning(ProductModel)
     )
-    category = category_result.first()
-    if not category:
+    if db_product is None:
+        await _raise_not_updated(db, product_id, current_user, "Product not found",
+                                 "Вы можете обновлять только свои собственные продукты")
+
+    # Проверяем, существует ли активная категория (без commit изменение откатится)
+    snapshot = await category_cache.get()
+    if not snapshot.is_active(product.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
 
-    # Обновляем товар
-    await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(**product.model_dump())
-    )
+    await record_change(db, "product", product_id, "update")
+    await refresh_product_listings(db, [product_id])
     await db.commit()
-    await db.refresh(db_product)
+    await response_cache.invalidate("products")
     return db_product
 
 
 @router.delete("/{product_id}", response_model=ProductSchema)
 async def delete_product(product_id: int,
                          db: AsyncSession = Depends(get_async_db),
-                         current_user: UserModel = Depends(get_current_seller)):
+                         current_user: Principal = Depends(get_current_seller)):
     """
     Выполняет мягкое удаление товара по его ID, устанавливая is_active = False.
+    Проверка владельца и удаление выполняются одним UPDATE ... RETURNING.
     """
-    # Проверяем, существует ли активный товар
-    product_result = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True)
-    )
-    product = product_result.first()
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or inactive")
-    if product.seller_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Вы можете удалять только свои собственные продукты")
-
-    # Проверяем, существует ли активная категория
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id,
-                                    CategoryModel.is_active == True)
+    product = await db.scalar(
+        update(ProductModel)
+        .where(ProductModel.id == product_id,
+               ProductModel.is_active == True,
+               ProductModel.seller_id == current_user.id)
+        .values(is_active=False, version=ProductModel.version + 1)
+        .returning(ProductModel)
     )
-    if not category_result.first():
+    if product is None:
+        await _raise_not_updated(db, product_id, current_user, "Product not found or inactive",
+                                 "Вы можете удалять только свои собственные продукты")
+
+    # Проверяем, существует ли активная категория (без commit изменение откатится)
+    snapshot = await category_cache.get()
+    if not snapshot.is_active(product.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Category not found or inactive")
 
-    # Устанавливаем is_active=False
-    product.is_active = False
+    await record_change(db, "product", product_id, "delete")
+    await refresh_product_listings(db, [product_id])
     await db.commit()
-
+    await response_cache.invalidate("products")
     return product
@@ -0,0 +1,171 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import Principal, get_current_buyer
+from app.config import settings
+from app.db_depends import get_async_db
+from app.models.reservations import Reservation as ReservationModel
+from app.schemas import Reservation as ReservationSchema, ReservationCreate
+from app.utils.change_log import record_changes
+from app.utils.read_model import refresh_product_listings
+from app.utils.reservations import is_retryable, reserve_stock, restore_stock
+from app.utils.response_cache import product_tag, response_cache
+
+router = APIRouter(
+    prefix="/reservations",
+    tags=["reservations"],
+)
+
+
+async def _find_by_key(db: AsyncSession, user_id: int, idempotency_key: str) -> ReservationModel | None:
+    return await db.scalar(select(ReservationModel).where(ReservationModel.user_id == user_id,
+                                                          ReservationModel.idempotency_key == idempotency_key))
+
+
+def _replay(reservation: ReservationModel, items: list[tuple[int, int]], response: Response) -> ReservationModel:
+    """
+    Повтор запроса с тем же Idempotency-Key: возвращает созданный ранее резерв,
+    если состав совпадает.
+    """
+    if [(item.product_id, item.quantity) for item in reservation.items] != items:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Idempotency-Key уже использован для резерва с другим составом")
+    response.status_code = status.HTTP_200_OK
+    return reservation
+
+
+@router.post("/", response_model=ReservationSchema, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+        payload: ReservationCreate,
+        response: Response,
+        idempotency_key: str = Header(alias="Idempotency-Key", min_length=1, max_length=100),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_buyer)):
+    """
+    Резервирует товары: остатки всех позиций списываются атомарно или не списываются вовсе.
+    Резерв нужно подтвердить до expires_at, иначе остатки вернутся на склад.
+    Повтор с тем же заголовком Idempotency-Key возвращает уже созданный резерв (200).
+    Доступ: buyer.
+    """
+    quantities = Counter()
+    for item in payload.items:
+        quantities[item.product_id] += item.quantity
+    # Позиции в порядке ID товара — одинаковый порядок блокировок строк у всех покупателей
+    items = sorted(quantities.items())
+    if len(items) > settings.RESERVATION_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Не больше {settings.RESERVATION_MAX_ITEMS} товаров в одном резерве")
+
+    existing = await _find_by_key(db, current_user.id, idempotency_key)
+    if existing is not None:
+        return _replay(existing, items, response)
+
+    for attempt in range(settings.RESERVATION_DEADLOCK_RETRIES + 1):
+        reservation = ReservationModel(user_id=current_user.id, idempotency_key=idempotency_key,
+                                       expires_at=func.now() + timedelta(seconds=settings.RESERVATION_TTL))
+        try:
+            db.add(reservation)
+            await db.flush()
+            reserved = await reserve_stock(db, reservation.id, items)
+            if len(reserved) < len(items):
+                await db.rollback()
+                unavailable = sorted(set(quantities) - set(reserved))
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                    detail={"message": "Товар недоступен или его недостаточно на складе",
+                                            "product_ids": unavailable})
+            await record_changes(db, "product", reserved, "update")
+            await refresh_product_listings(db, reserved)
+            await db.commit()
+            break
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел создать резерв первым
+            await db.rollback()
+            existing = await _find_by_key(db, current_user.id, idempotency_key)
+            if existing is None:
+                raise
+            return _replay(existing, items, response)
+        except DBAPIError as exc:
+            await db.rollback()
+            if not is_retryable(exc) or attempt == settings.RESERVATION_DEADLOCK_RETRIES:
+                raise
+            await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+
+    # Остатки изменились только у товаров резерва: сбрасываем их карточки, списки доживают свой TTL
+    await response_cache.invalidate(*map(product_tag, reserved))
+    await db.refresh(reservation, ["created_at", "expires_at", "items"])
+    return reservation
+
+
+async def _get_own_reservation(db: AsyncSession, reservation_id: int, user_id: int) -> ReservationModel:
+    reservation = await db.get(ReservationModel, reservation_id)
+    if reservation is None or reservation.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Резерв не найден")
+    return reservation
+
+
+async def _finish_pending(db: AsyncSession, reservation_id: int, user_id: int, new_status: str) -> ReservationModel:
+    """
+    Переводит неистёкший резерв из pending в new_status одним условным UPDATE.
+    Если резерв не найден или уже не pending — 404 или 409.
+    """
+    reservation = await db.scalar(
+        update(ReservationModel)
+        .where(ReservationModel.id == reservation_id,
+               ReservationModel.user_id == user_id,
+               ReservationModel.status == "pending",
+               ReservationModel.expires_at > func.now())
+        .values(status=new_status)
+        .returning(ReservationModel)
+    )
+    if reservation is None:
+        current = await _get_own_reservation(db, reservation_id, user_id)
+        detail = "Срок резерва истёк" if current.status == "pending" else f"Резерв уже в статусе {current.status}"
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+    return reservation
+
+
+@router.get("/{reservation_id}", response_model=ReservationSchema)
+async def get_reservation(reservation_id: int,
+                          db: AsyncSession = Depends(get_async_db),
+                          current_user: Principal = Depends(get_current_buyer)):
+    """
+    Возвращает резерв текущего покупателя.
+    """
+    return await _get_own_reservation(db, reservation_id, current_user.id)
+
+
+@router.post("/{reservation_id}/confirm", response_model=ReservationSchema)
+async def confirm_reservation(reservation_id: int,
+                              db: AsyncSession = Depends(get_async_db),
+                              current_user: Principal = Depends(get_current_buyer)):
+    """
+    Подтверждает резерв (покупка оформлена): остатки остаются списанными.
+    """
+    reservation = await _finish_pending(db, reservation_id, current_user.id, "confirmed")
+    await db.commit()
+    await db.refresh(reservation, ["items"])
+    return reservation
+
+
+@router.post("/{reservation_id}/release", response_model=ReservationSchema)
+async def release_reservation(reservation_id: int,
+                              db: AsyncSession = Depends(get_async_db),
+                              current_user: Principal = Depends(get_current_buyer)):
+    """
+    Отменяет резерв и возвращает остатки на склад.
+    """
+    reservation = await _finish_pending(db, reservation_id, current_user.id, "released")
+    product_ids = await restore_stock(db, [reservation.id])
+    await record_changes(db, "product", product_ids, "update")
+    await refresh_product_listings(db, product_ids)
+    await db.commit()
+    await response_cache.invalidate(*map(product_tag, product_ids))
+    await db.refresh(reservation, ["items"])
+    return reservation
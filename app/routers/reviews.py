@@ -1,63 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from datetime import datetime
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 
 from app.models.reviews import Review as ReviewModel
 from app.models.products import Product as ProductModel
-from app.models.users import User as UserModel
-
-from app.schemas import Review as ReviewSchema, ReviewCreate
-from app.db_depends import get_async_db
-from app.auth import get_current_admin, get_current_buyer
-from app.utils.rating import update_product_rating
+from app.models.product_listings import ProductListing
+
+from app.config import settings
+from app.schemas import Review as ReviewSchema, ReviewCreate, ReviewList
+from app.db_depends import get_async_db, get_async_read_db
+from app.auth import Principal, get_current_admin, get_current_buyer
+from app.utils.change_log import record_change
+from app.utils.etag import etag_matches, make_etag, not_modified, set_cache_headers
+from app.utils.export import export_response
+from app.utils.fields import fields_query, parse_fields
+from app.utils.pagination import apply_keyset, decode_cursor, encode_cursor
+from app.utils.rating import apply_review_grade
+from app.utils.rating_queue import rating_queue
+from app.utils.read_model import refresh_product_listings
+from app.utils.response_cache import response_cache
+from app.utils.serialization import RowSerializer
 
 router = APIRouter(
     prefix="/reviews",
     tags=["reviews"],
 )
 
+_review_rows = RowSerializer(ReviewSchema, ReviewModel)
+
+# SQLSTATE нарушения уникальности в Postgres
+UNIQUE_VIOLATION = "23505"
 
-@router.get("/", response_model=list[ReviewSchema])
-async def get_all_reviews(db: AsyncSession = Depends(get_async_db)):
+
+@router.get("/", response_model=ReviewList)
+async def get_all_reviews(
+        limit: int = Query(20, ge=1, le=100, description="Количество отзывов на странице"),
+        cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+        grade: int | None = Query(None, ge=1, le=5, description="Только отзывы с этой оценкой"),
+        fields: str | None = fields_query(ReviewSchema),
+        db: AsyncSession = Depends(get_async_read_db)):
     """
-    Возвращает список всех активных отзывов
+    Возвращает страницу активных отзывов, от новых к старым.
+    С fields= выбираются и отдаются только указанные колонки.
     """
-    result = await db.scalars(
-        select(ReviewModel).where(ReviewModel.is_active == True).order_by(ReviewModel.comment_date.desc())
-    )
-    return result.all()
+    serializer = _review_rows.project(parse_fields(fields, ReviewSchema))
+    stmt = select(*serializer.select_columns(ReviewModel.comment_date)).where(ReviewModel.is_active == True)
+    return Response(content=await _load_review_page(db, serializer, stmt, limit, cursor, grade),
+                    media_type="application/json")
 
 
-@router.get("/{product_id}/reviews/", response_model=list[ReviewSchema])
-async def get_reviews_for_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def _load_review_page(db: AsyncSession, serializer: RowSerializer, stmt, limit: int, cursor: str | None,
+                            grade: int | None) -> bytes:
     """
-    Возвращает список активных отзывов для указанного товара.
+    Страница отзывов по ключу (comment_date, id) по убыванию, сразу в виде JSON.
+    stmt должен выбирать comment_date и id, даже если их нет среди полей ответа.
     """
-    # Проверка существования и активности товара
-    product = await db.get(ProductModel, product_id)
-    if not product or not product.is_active:
+    after = None
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(payload["v"]), int(payload["id"]))
+        except (KeyError, TypeError, ValueError):
+            after = None
+        if payload.get("s") != "reviews" or after is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Курсор не соответствует списку отзывов")
+
+    if grade is not None:
+        stmt = stmt.where(ReviewModel.grade == grade)
+    stmt = apply_keyset(stmt, ReviewModel.comment_date, ReviewModel.id, True, after).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"s": "reviews", "v": last.comment_date.isoformat(), "id": last.id})
+    return orjson.dumps({"items": serializer.items(rows), "next_cursor": next_cursor})
+
+
+@router.get("/export")
+async def export_reviews(
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$",
+                                   description="Формат выгрузки: ndjson или csv")):
+    """
+    Потоково выгружает все активные отзывы в NDJSON или CSV.
+    """
+    stmt = select(*[getattr(ReviewModel, name) for name in ReviewSchema.model_fields]).where(
+        ReviewModel.is_active == True)
+    return export_response(stmt.order_by(ReviewModel.id), export_format, "reviews")
+
+
+@router.get("/{product_id}/reviews/", response_model=ReviewList)
+async def get_reviews_for_product(
+        product_id: int,
+        request: Request,
+        limit: int = Query(20, ge=1, le=100, description="Количество отзывов на странице"),
+        cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+        grade: int | None = Query(None, ge=1, le=5, description="Только отзывы с этой оценкой"),
+        fields: str | None = fields_query(ReviewSchema),
+        db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает страницу активных отзывов для указанного товара, от новых к старым.
+    Версия товара меняется при каждом изменении его отзывов, поэтому служит ETag списка.
+    """
+    serializer = _review_rows.project(parse_fields(fields, ReviewSchema))
+
+    # Проверка существования и видимости товара (с учётом категорий, см. ProductListing)
+    version = await db.scalar(select(ProductModel.version)
+                              .join(ProductListing, ProductListing.id == ProductModel.id)
+                              .where(ProductModel.id == product_id, ProductListing.is_visible == True))
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Товар не найден или не активен."
         )
 
+    etag = make_etag("r", product_id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.REVIEW_CACHE_CONTROL)
+
     # Получение активных отзывов
-    result = await db.scalars(
-        select(ReviewModel)
-        .where(
-            ReviewModel.product_id == product_id,
-            ReviewModel.is_active == True
-        )
-        .order_by(ReviewModel.comment_date.desc())
+    stmt = select(*serializer.select_columns(ReviewModel.comment_date)).where(
+        ReviewModel.product_id == product_id,
+        ReviewModel.is_active == True
     )
-    return result.all()
+    response = Response(content=await _load_review_page(db, serializer, stmt, limit, cursor, grade),
+                        media_type="application/json")
+    set_cache_headers(response, etag, settings.REVIEW_CACHE_CONTROL)
+    return response
+
+
+async def _apply_grade(db: AsyncSession, product_id: int, grade: int, delta: int) -> None:
+    """
+    В режиме inline меняет счётчики товара в текущей транзакции.
+    В режиме background строка товара не трогается — счётчики и версию (ETag списка
+    отзывов) обновит очередь.
+    """
+    if settings.RATING_UPDATE_MODE == "inline":
+        await apply_review_grade(db, product_id, grade, delta)
+        await record_change(db, "product", product_id, "update")
+        await refresh_product_listings(db, [product_id])
+
+
+async def _after_commit(product_id: int) -> None:
+    """
+    В режиме inline рейтинг уже изменён — сбрасываем кэш товаров. В режиме background
+    товар ставится в очередь, и кэш сбрасывает она после пересчёта: сброс здесь
+    позволил бы кэшу снова заполниться старым рейтингом до пересчёта.
+    """
+    if settings.RATING_UPDATE_MODE == "background":
+        rating_queue.mark_dirty(product_id)
+    else:
+        await response_cache.invalidate("products")
 
 
 @router.post("/", response_model=ReviewSchema, status_code=status.HTTP_201_CREATED)
 async def create_review(
         review_data: ReviewCreate,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_buyer)
+        current_user: Principal = Depends(get_current_buyer)
 ):
     """
     Создаёт новый отзыв (оценка 1-5). Автоматически пересчитывает рейтинг продукта.
@@ -74,36 +180,33 @@ async def create_review(
             detail="Товар не найден или не активен."
         )
 
-    # Проверка: не оставлял ли пользователь уже активный отзыв на этот товар?
-    existing_review = await db.scalar(
-        select(ReviewModel).where(
-            and_(
-                ReviewModel.product_id == product_id,
-                ReviewModel.user_id == user_id,
-                ReviewModel.is_active == True
-            )
-        )
+    # Создание отзыва.
+    db_review = ReviewModel(
+        **review_data.model_dump(),
+        user_id=user_id
     )
 
-    if existing_review:
+    # Один активный отзыв на товар обеспечивает частичный уникальный индекс
+    # uq_reviews_user_id_product_id_active: проверка без гонки между SELECT и INSERT
+    try:
+        db.add(db_review)
+        # Учёт оценки в рейтинге товара в той же транзакции
+        await _apply_grade(db, product_id, db_review.grade, 1)
+        await db.flush()
+    except IntegrityError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "sqlstate", None) != UNIQUE_VIOLATION:
+            raise
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Вы уже оставили активный отзыв на этот товар. Обновите или удалите его, чтобы создать новый."
         )
 
-    # Создание отзыва.
-    db_review = ReviewModel(
-        **review_data.model_dump(),
-        user_id=user_id
-    )
-
-    db.add(db_review)
+    await record_change(db, "review", db_review.id, "create")
     await db.commit()
+    await _after_commit(product_id)
     await db.refresh(db_review)
 
-    # Пересчёт рейтинга товара
-    await update_product_rating(db, product_id)
-
     return db_review
 
 
@@ -111,29 +214,31 @@ async def create_review(
 async def delete_review(
         review_id: int,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_admin)
+        current_user: Principal = Depends(get_current_admin)
 ):
     """
     Выполняет мягкое удаление отзыва (is_active = False) и пересчитывает рейтинг товара.
     Доступ: admin.
     """
-    # Находим активный отзыв
-    review = await db.get(ReviewModel, review_id)
+    # Мягкое удаление активного отзыва одним условным UPDATE,
+    # чтобы параллельные удаления не исключили оценку из рейтинга дважды
+    review = await db.scalar(
+        update(ReviewModel)
+        .where(ReviewModel.id == review_id, ReviewModel.is_active == True)
+        .values(is_active=False)
+        .returning(ReviewModel)
+    )
 
-    if not review or not review.is_active:
+    if not review:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Отзыв не найден или уже не активен."
         )
 
-    product_id = review.product_id
-
-    # Мягкое удаление
-    review.is_active = False
+    # Исключение оценки из рейтинга товара в той же транзакции
+    await _apply_grade(db, review.product_id, review.grade, -1)
+    await record_change(db, "review", review_id, "delete")
     await db.commit()
+    await _after_commit(review.product_id)
 
-    # 3. Пересчёт рейтинга товара
-    await update_product_rating(db, product_id)
-
-    # Возвращаем 204 No Content
     return review
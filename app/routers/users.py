@@ -8,7 +8,8 @@ from app.config import settings
 from app.models.users import User as UserModel
 from app.schemas import UserCreate, User as UserSchema
 from app.db_depends import get_async_db
-from app.auth import hash_password, verify_password, create_access_token, create_refresh_token
+from app.auth import (hash_password_async, verify_and_update_password, create_access_token,
+                      create_refresh_token, get_current_admin, auth_cache_stats)
 
 router = APIRouter(prefix="/users", tags=['users'])
 
@@ -33,7 +34,7 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)
     # Создание объекта пользователя с хешированным паролем
     db_user = UserModel(
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await hash_password_async(user.password),
         role=user.role
     )
 
@@ -51,12 +52,19 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(),
     """
     result = await db.scalars(select(UserModel).where(UserModel.email == form_data.username))
     user = result.first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    is_valid, new_hash = False, None
+    if user:
+        is_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Хеш создан с устаревшей стоимостью bcrypt — сохраняем пересчитанный
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = create_access_token(data={"sub": user.email, "role": user.role, "id": user.id})
     refresh_token = create_refresh_token(data={"sub": user.email, "role": user.role, "id": user.id})
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
@@ -83,3 +91,12 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async
         raise credentials_exception
     access_token = create_access_token(data={"sub": user.email, "role": user.role, "id": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/auth-cache/stats", dependencies=[Depends(get_current_admin)])
+async def get_auth_cache_stats():
+    """
+    Возвращает размер и счётчики попаданий/промахов кэшей аутентификации.
+    Доступ: admin.
+    """
+    return auth_cache_stats()
@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import Optional
+from typing import Annotated, Optional
 from datetime import datetime
 
+# Наибольшее значение колонки integer в Postgres: больший ID не найдётся,
+# а в параметре запроса вызовет ошибку драйвера
+MAX_DB_ID = 2**31 - 1
+
 
 class CategoryCreate(BaseModel):
     """
@@ -58,6 +62,48 @@ class Product(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductList(BaseModel):
+    """
+    Модель для ответа со страницей товаров.
+    Используется в GET-запросах с курсорной пагинацией.
+    """
+    items: list[Product] = Field(description="Товары на текущей странице")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None, если страниц больше нет)")
+
+
+class ProductBatchRequest(BaseModel):
+    """
+    Модель запроса пакетного получения товаров (POST-форма для длинных списков).
+    """
+    ids: list[Annotated[int, Field(ge=1, le=MAX_DB_ID)]] = Field(
+        min_length=1, description="ID товаров; порядок сохраняется в ответе")
+
+
+class ProductBatch(BaseModel):
+    """
+    Модель для ответа на пакетное получение товаров.
+    """
+    items: list[Product] = Field(description="Найденные активные товары в порядке запроса")
+    missing: list[int] = Field(description="ID, которые не найдены, неактивны или в неактивной категории")
+
+
+class ProductImportError(BaseModel):
+    """
+    Ошибка в строке массового импорта товаров.
+    """
+    row: int = Field(description="Номер строки данных (с 1, без заголовка CSV)")
+    detail: str = Field(description="Описание ошибки")
+
+
+class ProductImportResult(BaseModel):
+    """
+    Модель для ответа на массовый импорт товаров.
+    """
+    inserted: int = Field(description="Количество добавленных товаров")
+    failed: int = Field(description="Количество отклонённых строк")
+    errors: list[ProductImportError] = Field(description="Ошибки по строкам (не больше PRODUCT_IMPORT_MAX_ERRORS)")
+
+
 class UserCreate(BaseModel):
     email: EmailStr = Field(description="Email пользователя")
     password: str = Field(min_length=8, description="Пароль (минимум 8 символов)")
@@ -95,3 +141,75 @@ class Review(BaseModel):
     is_active: bool = Field(description="Активность отзыва")
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ReviewList(BaseModel):
+    """
+    Модель для ответа со страницей отзывов.
+    Используется в GET-запросах с курсорной пагинацией.
+    """
+    items: list[Review] = Field(description="Отзывы на текущей странице")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None, если страниц больше нет)")
+
+
+class RatingSummary(BaseModel):
+    """
+    Модель для ответа со сводкой оценок товара.
+    """
+    product_id: int = Field(description="ID товара")
+    count: int = Field(description="Количество активных отзывов")
+    average: float = Field(description="Средняя оценка (0.0, если отзывов нет)")
+    distribution: dict[int, int] = Field(description="Количество отзывов по каждой оценке от 1 до 5")
+
+
+class Change(BaseModel):
+    """
+    Запись журнала изменений каталога.
+    """
+    version: int = Field(description="Версия изменения (номер транзакции), растёт монотонно")
+    entity: str = Field(description="Тип сущности: product, category или review")
+    entity_id: int = Field(description="ID изменённой сущности")
+    action: str = Field(description="Действие: create, update или delete")
+    changed_at: datetime = Field(description="Время изменения")
+
+
+class ChangeList(BaseModel):
+    """
+    Модель для ответа с пакетом изменений.
+    """
+    items: list[Change] = Field(description="Изменения в порядке версий")
+    next_since: int = Field(description="Значение since для следующего запроса")
+
+
+class ReservationItemCreate(BaseModel):
+    """
+    Позиция резервирования: товар и количество.
+    """
+    product_id: int = Field(description="ID товара")
+    quantity: int = Field(ge=1, le=10000, description="Количество (от 1)")
+
+
+class ReservationCreate(BaseModel):
+    """
+    Модель для создания резерва. Повторные позиции одного товара суммируются.
+    """
+    items: list[ReservationItemCreate] = Field(min_length=1, description="Позиции резерва")
+
+
+class ReservationItem(BaseModel):
+    product_id: int = Field(description="ID товара")
+    quantity: int = Field(description="Зарезервированное количество")
+    price: float = Field(description="Цена товара на момент резервирования")
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Reservation(BaseModel):
+    """
+    Модель для ответа с данными резерва.
+    """
+    id: int = Field(description="ID резерва")
+    status: str = Field(description="Статус: pending, confirmed, released или expired")
+    created_at: datetime = Field(description="Время создания")
+    expires_at: datetime = Field(description="Срок, до которого резерв нужно подтвердить")
+    items: list[ReservationItem] = Field(description="Позиции резерва")
+    model_config = ConfigDict(from_attributes=True)
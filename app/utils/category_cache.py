@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.categories import Category as CategoryModel
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryNode:
+    """
+    Неизменяемая копия строки категории внутри снимка.
+    """
+    id: int
+    name: str
+    parent_id: int | None
+    is_active: bool
+    path: str
+
+
+class CategorySnapshot:
+    """
+    Снимок всего дерева категорий: узлы и их активность.
+    Не изменяется после построения, поэтому безопасно читается из любых корутин.
+    """
+
+    def __init__(self, nodes: list[CategoryNode], version: int, generation: int):
+        self.version = version
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.nodes: dict[int, CategoryNode] = {node.id: node for node in nodes}
+        self.active: list[CategoryNode] = [node for node in nodes if node.is_active]
+        # Хеш содержимого активных категорий: одинаков во всех воркерах для одинаковых данных
+        self.etag = hashlib.blake2b(
+            repr([(node.id, node.name, node.parent_id) for node in self.active]).encode(), digest_size=8
+        ).hexdigest()
+
+    def get(self, category_id: int) -> CategoryNode | None:
+        return self.nodes.get(category_id)
+
+    def is_active(self, category_id: int) -> bool:
+        node = self.nodes.get(category_id)
+        return node is not None and node.is_active
+
+
+class CategoryCache:
+    """
+    Кэш снимка дерева категорий в памяти процесса.
+    invalidate() вызывается роутером категорий после каждой записи;
+    следующий get() загружает новый снимок одним запросом в отдельной сессии.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: CategorySnapshot | None = None
+        self._generation = 0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, snapshot: CategorySnapshot | None) -> bool:
+        return (snapshot is not None
+                and snapshot.generation == self._generation
+                and time.monotonic() - snapshot.loaded_at < self.ttl)
+
+    def invalidate(self) -> None:
+        """
+        Помечает текущий снимок устаревшим.
+        """
+        self._generation += 1
+
+    async def get(self) -> CategorySnapshot:
+        """
+        Возвращает актуальный снимок, при необходимости загружая его из базы.
+        Параллельные промахи ждут одну загрузку. Снимок всегда читается из основной
+        базы, чтобы сразу после записи не закэшировать отстающую реплику.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+            # Инвалидация во время загрузки оставит снимок устаревшим,
+            # и следующий get() загрузит его заново
+            generation = self._generation
+            async with async_session_maker() as db:
+                rows = (await db.execute(
+                    select(CategoryModel.id, CategoryModel.name, CategoryModel.parent_id,
+                           CategoryModel.is_active, CategoryModel.path).order_by(CategoryModel.id)
+                )).all()
+            self._version += 1
+            snapshot = CategorySnapshot([CategoryNode(*row) for row in rows], self._version, generation)
+            self._snapshot = snapshot
+            return snapshot
+
+
+category_cache = CategoryCache(settings.CATEGORY_CACHE_TTL)
@@ -0,0 +1,54 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.categories import Category as CategoryModel
+
+# Ключ advisory-блокировки дерева категорий
+CATEGORY_TREE_LOCK_KEY = 0x63617465
+
+
+def child_path(parent: CategoryModel | None, category_id: int) -> str:
+    """
+    Возвращает материализованный путь категории с указанным родителем.
+    """
+    return f"{parent.path if parent is not None else '/'}{category_id}/"
+
+
+def subtree_filter(path: str):
+    """
+    Условие «категория лежит в поддереве с корнем path» (включая сам корень).
+    Путь состоит только из цифр и '/', поэтому экранирование не требуется.
+    """
+    return CategoryModel.path.like(f"{path}%")
+
+
+async def lock_category_tree(db: AsyncSession, exclusive: bool = False) -> None:
+    """
+    Берёт транзакционную advisory-блокировку дерева категорий.
+    Перемещения поддеревьев берут её эксклюзивно, создание дочерних категорий — разделяемо,
+    чтобы путь родителя не изменился между чтением и записью.
+    """
+    lock = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+    await db.execute(select(lock(CATEGORY_TREE_LOCK_KEY)))
+
+
+async def move_category(db: AsyncSession, category: CategoryModel, new_parent: CategoryModel | None) -> None:
+    """
+    Переносит категорию вместе с поддеревом под нового родителя (None — в корень).
+    Пути всех потомков переписываются одним UPDATE. Перенос категории внутрь
+    собственного поддерева отклоняется, поэтому циклы в дереве невозможны.
+    Вызывать после lock_category_tree(db, exclusive=True).
+    """
+    old_path = category.path
+    if new_parent is not None and new_parent.path.startswith(old_path):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Нельзя переместить категорию внутрь её собственного поддерева")
+
+    new_path = child_path(new_parent, category.id)
+    await db.execute(
+        update(CategoryModel)
+        .where(subtree_filter(old_path))
+        .values(path=literal(new_path) + func.substr(CategoryModel.path, len(old_path) + 1))
+        .execution_options(synchronize_session="fetch")
+    )
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from typing import Iterable, Literal
+
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, Text, cast, delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.change_log import ChangeLog, ChangeLogState
+
+Entity = Literal["product", "category", "review"]
+Action = Literal["create", "update", "delete"]
+
+# Самая старая ещё не завершённая транзакция. Все транзакции с меньшим номером
+# завершены, поэтому изменения с txid ниже этой границы уже не появятся «задним числом».
+_visible_horizon = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+CHANGE_COLUMNS = (ChangeLog.txid.label("version"), ChangeLog.entity, ChangeLog.entity_id,
+                  ChangeLog.action, ChangeLog.changed_at)
+
+
+async def record_changes(db: AsyncSession, entity: Entity, entity_ids: Iterable[int], action: Action) -> None:
+    """
+    Записывает изменения в журнал в текущей транзакции (commit выполняет вызывающий код).
+    """
+    rows = [{"entity": entity, "entity_id": entity_id, "action": action} for entity_id in entity_ids]
+    if rows:
+        await db.execute(insert(ChangeLog), rows)
+
+
+async def record_change(db: AsyncSession, entity: Entity, entity_id: int, action: Action) -> None:
+    await record_changes(db, entity, (entity_id,), action)
+
+
+async def change_log_head(db: AsyncSession) -> int:
+    """
+    Текущая версия журнала: с неё новый потребитель начинает читать дельты
+    после полной выгрузки каталога.
+    """
+    head = await db.scalar(select(func.max(ChangeLog.txid)).where(ChangeLog.txid < _visible_horizon))
+    if head is None:
+        head = await db.scalar(select(ChangeLogState.compacted_through).where(ChangeLogState.id == 1))
+    return head or 0
+
+
+async def check_retained(db: AsyncSession, since: int) -> None:
+    """
+    Изменения после since должны ещё храниться в журнале, иначе — 410:
+    потребителю нужна полная перезагрузка каталога.
+    """
+    compacted_through = await db.scalar(
+        select(ChangeLogState.compacted_through).where(ChangeLogState.id == 1))
+    if since < (compacted_through or 0):
+        raise HTTPException(status_code=status.HTTP_410_GONE,
+                            detail="Изменения до этой версии удалены из журнала, выполните полную выгрузку")
+
+
+async def fetch_changes(db: AsyncSession, since: int, limit: int) -> tuple[list, int]:
+    """
+    Изменения с версией больше since в порядке версий: (строки, версия для следующего запроса).
+    Транзакция никогда не делится между пакетами, поэтому следующий запрос
+    можно делать строго «после» последней версии.
+    """
+    stmt = (select(*CHANGE_COLUMNS)
+            .where(ChangeLog.txid > since, ChangeLog.txid < _visible_horizon)
+            .order_by(ChangeLog.txid, ChangeLog.id))
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+
+    if len(rows) > limit:
+        cut_version = rows[limit].version
+        complete = [row for row in rows[:limit] if row.version != cut_version]
+        if complete:
+            rows = complete
+        else:
+            # Одна транзакция больше пакета — отдаём её целиком
+            rows = (await db.execute(stmt.where(ChangeLog.txid == cut_version))).all()
+    return rows, rows[-1].version if rows else since
+
+
+async def compact_changes(db: AsyncSession, retention: timedelta) -> dict:
+    """
+    Компактизация журнала (commit выполняет вызывающий код):
+    * из нескольких записей об одной сущности остаётся только последняя —
+      потребителю достаточно знать, что сущность изменилась;
+    * записи старше retention удаляются, граница сохраняется в change_log_state,
+      и запросы с более ранней версией получают 410.
+    """
+    newer = aliased(ChangeLog)
+    superseded = await db.execute(
+        delete(ChangeLog)
+        .where(newer.entity == ChangeLog.entity,
+               newer.entity_id == ChangeLog.entity_id,
+               tuple_(newer.txid, newer.id) > tuple_(ChangeLog.txid, ChangeLog.id),
+               newer.txid < _visible_horizon)
+        .execution_options(synchronize_session=False)
+    )
+
+    expired_through = await db.scalar(
+        select(func.max(ChangeLog.txid))
+        .where(ChangeLog.changed_at < func.now() - retention, ChangeLog.txid < _visible_horizon)
+    )
+    expired = 0
+    if expired_through is not None:
+        expired = (await db.execute(
+            delete(ChangeLog).where(ChangeLog.txid <= expired_through)
+            .execution_options(synchronize_session=False)
+        )).rowcount
+        await db.execute(
+            update(ChangeLogState)
+            .where(ChangeLogState.id == 1)
+            .values(compacted_through=func.greatest(ChangeLogState.compacted_through, expired_through))
+        )
+    return {"superseded": superseded.rowcount, "expired": expired, "compacted_through": expired_through}
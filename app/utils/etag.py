@@ -0,0 +1,34 @@
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Собирает слабый ETag из частей, например make_etag("p", 5, 12) -> W/"p-5-12".
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, список тегов, '*').
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """
+    Ответ 304 без тела.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.config import settings
+from app.database import async_read_session_maker
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(columns: list[str], rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def _stream_rows(stmt: Select, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Читает результат запроса серверным курсором пачками по EXPORT_CHUNK_SIZE строк
+    и отдаёт каждую пачку сразу после кодирования. Память не зависит от размера таблицы.
+    Сессия (на реплике, если она задана) открывается здесь, а не через зависимость:
+    поток живёт дольше обработчика.
+    """
+    async with async_read_session_maker() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+        columns = list(result.keys())
+        if export_format == "csv":
+            yield _encode_csv([columns])
+        async for partition in result.partitions():
+            if export_format == "csv":
+                yield _encode_csv(partition)
+            else:
+                yield _encode_ndjson(columns, partition)
+
+
+def export_response(stmt: Select, export_format: str, filename: str) -> StreamingResponse:
+    """
+    Потоковый ответ с выгрузкой результата запроса в NDJSON или CSV.
+    Запрос должен выбирать отдельные колонки, а не ORM-сущности.
+    """
+    return StreamingResponse(
+        _stream_rows(stmt, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel, ConfigDict, create_model
+
+# Поля, которые возвращаются всегда: по ним клиент сопоставляет записи, а сервер строит курсор
+ALWAYS_INCLUDED = ("id",)
+
+
+def fields_query(schema: type[BaseModel]) -> Any:
+    """
+    Параметр запроса fields= со списком доступных полей в описании.
+    """
+    return Query(None, max_length=500,
+                 description="Поля ответа через запятую (id возвращается всегда). "
+                             f"Доступны: {', '.join(schema.model_fields)}")
+
+
+def parse_fields(raw: str | None, schema: type[BaseModel]) -> tuple[str, ...] | None:
+    """
+    Разбирает fields=name,price в кортеж полей в порядке схемы.
+    Без параметра — None (все поля). Неизвестное поле — ошибка 400.
+    """
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    return tuple(name for name in schema.model_fields if name in requested or name in ALWAYS_INCLUDED)
+
+
+@lru_cache(maxsize=256)
+def projected_model(schema: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Урезанная модель ответа только с полями fields (создаётся один раз на набор полей).
+    """
+    if fields == tuple(schema.model_fields):
+        return schema
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
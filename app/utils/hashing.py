@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+
+class PasswordHashPool:
+    """
+    Пул потоков для bcrypt. bcrypt отпускает GIL, поэтому хеширование в потоках
+    не блокирует event loop. Число ожидающих задач ограничено: при переполнении
+    или превышении таймаута запрос получает 503, а не стоит в бесконечной очереди.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def _on_done(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # event loop уже закрыт (остановка приложения)
+            pass
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет func(*args) в пуле и возвращает результат.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Сервис перегружен, повторите попытку позже",
+                                headers={"Retry-After": "1"})
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self._executor.submit(func, *args)
+        # Задача занимает место в очереди до фактического завершения в потоке,
+        # даже если ожидающий её запрос уже отвалился по таймауту
+        future.add_done_callback(lambda _: self._on_done(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Превышено время ожидания проверки пароля",
+                                headers={"Retry-After": "1"})
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending,
+                "max_pending": self.max_pending, "rejected": self.rejected}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
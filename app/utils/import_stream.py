@@ -0,0 +1,97 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator
+
+# Строка потока: (номер строки данных, распарсенный объект или None, ошибка разбора или None)
+ParsedRow = tuple[int, dict[str, Any] | None, str | None]
+
+
+async def iter_lines(stream: AsyncIterator[bytes], max_length: int) -> AsyncIterator[str | None]:
+    """
+    Разбивает поток байтов на строки, не накапливая его целиком в памяти.
+    Строка длиннее max_length символов не буферизуется: вместо неё выдаётся None,
+    а её остаток до следующего перевода строки пропускается.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = ""
+    # Пропускается остаток слишком длинной строки (None по ней уже выдан)
+    skipping = False
+    async for chunk in stream:
+        text = tail + decoder.decode(chunk)
+        lines = text.split("\n")
+        tail = lines.pop()
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line.rstrip("\r") if len(line) <= max_length else None
+        if len(tail) > max_length:
+            if not skipping:
+                yield None
+            skipping = True
+            tail = ""
+    tail += decoder.decode(b"", final=True)
+    if not skipping and tail.strip():
+        yield tail.rstrip("\r") if len(tail) <= max_length else None
+
+
+async def iter_ndjson_rows(stream: AsyncIterator[bytes], max_line_length: int) -> AsyncIterator[ParsedRow]:
+    """
+    Построчно разбирает NDJSON: один JSON-объект на строку, пустые строки пропускаются.
+    Строка длиннее max_line_length символов считается ошибочной.
+    """
+    row_number = 0
+    async for line in iter_lines(stream, max_line_length):
+        if line is None:
+            row_number += 1
+            yield row_number, None, f"Строка длиннее {max_line_length} символов"
+            continue
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, None, f"Некорректный JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Строка должна быть JSON-объектом"
+            continue
+        yield row_number, data, None
+
+
+async def iter_csv_rows(stream: AsyncIterator[bytes], max_record_length: int) -> AsyncIterator[ParsedRow]:
+    """
+    Разбирает CSV с заголовком. Поля в кавычках могут содержать переводы строк:
+    строки склеиваются, пока количество кавычек в записи нечётное.
+    Запись длиннее max_record_length символов (например, с незакрытой кавычкой)
+    считается ошибочной и отбрасывается, разбор продолжается со следующей строки.
+    Пустые значения передаются как None.
+    """
+    header: list[str] | None = None
+    record = ""
+    row_number = 0
+    async for line in iter_lines(stream, max_record_length):
+        if line is not None:
+            record = f"{record}\n{line}" if record else line
+        if line is None or len(record) > max_record_length:
+            record = ""
+            row_number += 1
+            yield row_number, None, f"Запись длиннее {max_record_length} символов"
+            continue
+        if record.count('"') % 2:
+            continue
+        values, record = next(csv.reader([record])), ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if not any(values):
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Ожидалось {len(header)} колонок, получено {len(values)}"
+            continue
+        yield row_number, {name: value if value != "" else None for name, value in zip(header, values)}, None
+    if record:
+        yield row_number + 1, None, "Незакрытая кавычка в последней записи"
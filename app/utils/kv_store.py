@@ -0,0 +1,66 @@
+import time
+from typing import Protocol
+
+
+class KeyValueStore(Protocol):
+    """
+    Минимальный интерфейс общего хранилища «ключ — значение» (Redis, Memcached и т.п.),
+    через которое несколько воркеров разделяют кэш и лимиты.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        """
+        Атомарно увеличивает целое значение ключа и возвращает новое.
+        ttl задаёт время жизни, если ключ создаётся этим вызовом.
+        """
+        ...
+
+    async def ttl(self, key: str) -> float | None:
+        """
+        Оставшееся время жизни ключа в секундах (None — ключа нет или он бессрочный).
+        """
+        ...
+
+
+class InMemoryKeyValueStore:
+    """
+    Локальная реализация KeyValueStore с той же семантикой, что у общего хранилища.
+    Используется по умолчанию в одиночном процессе и как замена Redis при проверке.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, bytes]] = {}
+
+    def _alive(self, key: str) -> tuple[float | None, bytes] | None:
+        item = self._data.get(key)
+        if item is not None and item[0] is not None and item[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    async def get(self, key: str) -> bytes | None:
+        item = self._alive(key)
+        return None if item is None else item[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        item = self._alive(key)
+        if item is None:
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            value = amount
+        else:
+            expires_at, value = item[0], int(item[1]) + amount
+        self._data[key] = (expires_at, str(value).encode())
+        return value
+
+    async def ttl(self, key: str) -> float | None:
+        item = self._alive(key)
+        if item is None or item[0] is None:
+            return None
+        return item[0] - time.monotonic()
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import json
+import math
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Упаковывает позицию последней строки страницы в непрозрачный курсор.
+    """
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Распаковывает курсор, полученный от клиента. Некорректный курсор — ошибка 400.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Некорректный курсор пагинации")
+    return payload
+
+
+def is_cursor_number(value: Any, integer: bool = False) -> bool:
+    """
+    Значение из курсора — конечное число (bool, None, строки и NaN не подходят),
+    при integer=True — целое. Иначе сравнение с колонкой дало бы ошибку базы или пустую страницу.
+    """
+    if isinstance(value, bool):
+        return False
+    if integer:
+        return isinstance(value, int)
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def query_digest(text: str) -> str:
+    """
+    Короткий хеш параметра запроса для привязки курсора к нему.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def apply_keyset(stmt: Select, sort_column: ColumnElement, id_column: ColumnElement,
+                 descending: bool, after: tuple[Any, int] | None = None) -> Select:
+    """
+    Добавляет к запросу стабильную сортировку по (sort_column, id) и условие
+    «строго после курсора». Сравнение кортежей в Postgres использует составной
+    индекс, поэтому стоимость N-й страницы не зависит от N.
+    """
+    if sort_column is id_column:
+        if after is not None:
+            stmt = stmt.where(id_column < after[1] if descending else id_column > after[1])
+        return stmt.order_by(id_column.desc() if descending else id_column.asc())
+
+    if after is not None:
+        left, right = tuple_(sort_column, id_column), tuple_(*after)
+        stmt = stmt.where(left < right if descending else left > right)
+    if descending:
+        return stmt.order_by(sort_column.desc(), id_column.desc())
+    return stmt.order_by(sort_column.asc(), id_column.asc())
@@ -1,24 +1,132 @@
+from typing import Sequence
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, case, cast, or_, Float, Numeric
 from sqlalchemy.sql import func
 from app.models.reviews import Review as ReviewModel
 from app.models.products import Product as ProductModel
+from app.utils.change_log import record_changes
+from app.utils.read_model import refresh_product_listings
+
+GRADES = (1, 2, 3, 4, 5)
 
+# Счётчики рейтинга, которые хранятся в строке товара
+COUNTER_FIELDS = ("rating_sum", "rating_count") + tuple(f"grade_{grade}_count" for grade in GRADES)
 
-async def update_product_rating(db: AsyncSession, product_id: int) -> None:
+
+def _rating_expr(rating_sum, rating_count):
     """
-    Пересчитывает средний рейтинг продукта на основе всех активных отзывов.
+    SQL-выражение среднего рейтинга по счётчикам (округление до 2 знаков).
     """
-    result = await db.execute(
-        select(func.avg(ReviewModel.grade)).where(
-            ReviewModel.product_id == product_id,
-            ReviewModel.is_active == True
-        )
+    return case(
+        (rating_count > 0, cast(func.round(cast(rating_sum, Numeric) / rating_count, 2), Float)),
+        else_=0.0,
+    )
+
+
+async def apply_review_grade(db: AsyncSession, product_id: int, grade: int, delta: int = 1) -> None:
+    """
+    Учитывает (delta=1) или исключает (delta=-1) оценку отзыва в счётчиках товара.
+    Выполняется одним атомарным UPDATE без чтения строки и без commit —
+    изменение фиксируется вместе с записью самого отзыва.
+    """
+    new_sum = ProductModel.rating_sum + grade * delta
+    new_count = ProductModel.rating_count + delta
+    grade_field = f"grade_{grade}_count"
+    await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id == product_id)
+        .values({
+            "rating_sum": new_sum,
+            "rating_count": new_count,
+            grade_field: getattr(ProductModel, grade_field) + delta,
+            "rating": _rating_expr(new_sum, new_count),
+            "version": ProductModel.version + 1,
+        })
+    )
+
+
+def _actual_counters(product_ids: Sequence[int] | None = None):
+    """
+    Запрос фактических значений счётчиков по таблице отзывов (один GROUP BY на все товары).
+    """
+    aggregate = (
+        select(ReviewModel.product_id,
+               func.sum(ReviewModel.grade).label("rating_sum"),
+               func.count().label("rating_count"),
+               *[func.count().filter(ReviewModel.grade == grade).label(f"grade_{grade}_count")
+                 for grade in GRADES])
+        .where(ReviewModel.is_active == True)
+        .group_by(ReviewModel.product_id)
     )
-    avg_rating = result.scalar()
-    new_rating = round(avg_rating, 2) if avg_rating is not None else 0.0
+    if product_ids is not None:
+        aggregate = aggregate.where(ReviewModel.product_id.in_(product_ids))
+    aggregate = aggregate.subquery()
 
-    product = await db.get(ProductModel, product_id)
-    if product:
-        product.rating = new_rating
-        await db.commit()
+    actual = (
+        select(ProductModel.id.label("product_id"),
+               *[func.coalesce(aggregate.c[field], 0).label(field) for field in COUNTER_FIELDS])
+        .outerjoin(aggregate, aggregate.c.product_id == ProductModel.id)
+    )
+    if product_ids is not None:
+        actual = actual.where(ProductModel.id.in_(product_ids))
+    return actual, aggregate
+
+
+async def rebuild_product_ratings(db: AsyncSession,
+                                  product_ids: Sequence[int] | None = None,
+                                  fix: bool = True) -> list[dict]:
+    """
+    Сверяет счётчики рейтинга с таблицей отзывов и возвращает расхождения.
+    При fix=True исправляет их одним UPDATE ... FROM (commit выполняет вызывающий код).
+    """
+    actual, aggregate = _actual_counters(product_ids)
+    actual_sum = func.coalesce(aggregate.c.rating_sum, 0)
+    actual_count = func.coalesce(aggregate.c.rating_count, 0)
+    drift_condition = or_(
+        ProductModel.rating != _rating_expr(actual_sum, actual_count),
+        *[getattr(ProductModel, field) != func.coalesce(aggregate.c[field], 0) for field in COUNTER_FIELDS],
+    )
+
+    drift = (await db.execute(
+        actual.add_columns(ProductModel.rating_sum.label("stored_sum"),
+                           ProductModel.rating_count.label("stored_count"),
+                           ProductModel.rating.label("stored_rating"))
+        .where(drift_condition)
+        .order_by(ProductModel.id)
+    )).mappings().all()
+
+    if fix and drift:
+        fixed = actual.where(drift_condition).subquery()
+        await db.execute(
+            update(ProductModel)
+            .where(ProductModel.id == fixed.c.product_id)
+            .values({
+                **{field: fixed.c[field] for field in COUNTER_FIELDS},
+                "rating": _rating_expr(fixed.c.rating_sum, fixed.c.rating_count),
+                "version": ProductModel.version + 1,
+            })
+            .execution_options(synchronize_session=False)
+        )
+        product_ids = [row["product_id"] for row in drift]
+        await record_changes(db, "product", product_ids, "update")
+        await refresh_product_listings(db, product_ids)
+    return [dict(row) for row in drift]
+
+
+async def bump_product_versions(db: AsyncSession, product_ids: Sequence[int]) -> None:
+    """
+    Увеличивает версию товаров без изменения счётчиков (commit выполняет вызывающий код).
+    Версия служит ETag списка отзывов, поэтому меняется после любой записи отзыва,
+    даже если итоговые счётчики совпали (отзыв добавлен и удалён до пересчёта).
+    """
+    if not product_ids:
+        return
+    await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id.in_(product_ids))
+        .values(version=ProductModel.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await record_changes(db, "product", product_ids, "update")
+    await refresh_product_listings(db, product_ids)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from itertools import islice
+
+from app.config import settings
+from app.database import async_session_maker
+from app.utils.rating import bump_product_versions, rebuild_product_ratings
+from app.utils.response_cache import product_tag, response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class RatingQueue:
+    """
+    Фоновый пересчёт рейтингов товаров (режим RATING_UPDATE_MODE="background").
+
+    Запись отзыва только помечает товар «грязным». Воркер ждёт debounce секунд,
+    чтобы собрать все изменения пачкой, и пересчитывает счётчики товаров пакетами
+    по batch_size одним UPDATE ... FROM (rebuild_product_ratings); версия каждого
+    товара пакета увеличивается, даже если счётчики не разошлись. Повторные
+    пометки одного товара схлопываются; пересчёт идёт по таблице отзывов, поэтому
+    параллельные записи не перетирают результат друг друга.
+    """
+
+    def __init__(self, debounce: float, batch_size: int):
+        self.debounce = debounce
+        self.batch_size = batch_size
+        # product_id -> момент первой пометки (monotonic), порядок вставки = порядок обработки
+        self._dirty: dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.processed = 0
+        self.batches = 0
+        self.failures = 0
+
+    def mark_dirty(self, *product_ids: int) -> None:
+        now = time.monotonic()
+        for product_id in product_ids:
+            self._dirty.setdefault(product_id, now)
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rating-queue")
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркер и пересчитывает всё, что осталось в очереди.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Не удалось пересчитать рейтинги при остановке, в очереди осталось %d товаров",
+                             len(self._dirty))
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.debounce)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Пакет уже возвращён в очередь; повторим после следующей паузы
+                logger.exception("Ошибка фонового пересчёта рейтингов")
+                self._wakeup.set()
+
+    async def flush(self) -> None:
+        """
+        Пересчитывает все помеченные товары. Можно вызывать напрямую (например, из тестов).
+        """
+        while self._dirty:
+            batch = {product_id: self._dirty.pop(product_id)
+                     for product_id in list(islice(self._dirty, self.batch_size))}
+            try:
+                async with async_session_maker() as db:
+                    drift = await rebuild_product_ratings(db, product_ids=list(batch))
+                    # Версию товаров с расхождением уже увеличил пересчёт, остальным — здесь
+                    fixed = {row["product_id"] for row in drift}
+                    unchanged = [product_id for product_id in batch if product_id not in fixed]
+                    await bump_product_versions(db, unchanged)
+                    await db.commit()
+            except BaseException as exc:
+                # Возвращаем пакет в очередь с самой ранней меткой, чтобы лаг не занижался
+                for product_id, marked_at in batch.items():
+                    self._dirty[product_id] = min(marked_at, self._dirty.get(product_id, marked_at))
+                if isinstance(exc, Exception):
+                    self.failures += 1
+                raise
+            self.processed += len(batch)
+            self.batches += 1
+            # Кэш сбрасывается после фиксации новых счётчиков и версий: карточки товаров
+            # пакета всегда, списки — если изменились рейтинги
+            await response_cache.invalidate(*map(product_tag, batch))
+            if drift:
+                await response_cache.invalidate("products")
+
+    def stats(self) -> dict:
+        oldest = min(self._dirty.values(), default=None)
+        return {
+            "mode": settings.RATING_UPDATE_MODE,
+            "pending": len(self._dirty),
+            "lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "processed": self.processed,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+rating_queue = RatingQueue(settings.RATING_QUEUE_DEBOUNCE, settings.RATING_QUEUE_BATCH_SIZE)
@@ -0,0 +1,81 @@
+from typing import Sequence
+
+from sqlalchemy import Integer, and_, any_, bindparam, cast, exists, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.categories import Category as CategoryModel
+from app.models.product_listings import ProductListing
+from app.models.products import Product as ProductModel
+from app.utils.category_tree import lock_category_tree, subtree_filter
+
+# Колонки товара, которые копируются в модель чтения без изменений
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "image_url", "stock", "is_active",
+                   "category_id", "seller_id", "rating", "version")
+
+_ancestor = aliased(CategoryModel)
+# Категория видима, если ни она, ни один из предков не выключен.
+# ID предков берутся из материализованного пути: '/1/4/9/' -> {1, 4, 9}
+_category_visible = ~exists().where(
+    _ancestor.id == any_(cast(func.string_to_array(func.btrim(CategoryModel.path, "/"), "/"), ARRAY(Integer))),
+    _ancestor.is_active == False,
+)
+
+
+def listings_upsert(where):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE строк модели чтения для товаров,
+    подходящих под where. Строки идут в порядке ID, поэтому параллельные
+    обновления блокируют строки модели в одном порядке.
+    """
+    # is_active и rating в products допускают NULL, в модели чтения — нет
+    defaults = {"is_active": False, "rating": 0.0}
+    columns = [func.coalesce(getattr(ProductModel, name), defaults[name]) if name in defaults
+               else getattr(ProductModel, name) for name in PRODUCT_COLUMNS]
+    rows = (
+        select(*columns,
+               CategoryModel.path,
+               and_(ProductModel.is_active.is_(True), _category_visible))
+        .join(CategoryModel, CategoryModel.id == ProductModel.category_id)
+        .where(where)
+        .order_by(ProductModel.id)
+    )
+    stmt = insert(ProductListing).from_select([*PRODUCT_COLUMNS, "category_path", "is_visible"], rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductListing.id],
+        set_={name: stmt.excluded[name] for name in (*PRODUCT_COLUMNS[1:], "category_path", "is_visible")},
+    )
+
+
+async def refresh_product_listings(db: AsyncSession, product_ids: Sequence[int]) -> None:
+    """
+    Пересобирает строки модели чтения для товаров после их изменения
+    (commit выполняет вызывающий код). Разделяемая блокировка дерева категорий
+    не даёт перемещению или выключению категории записать устаревшую видимость
+    параллельно с этой транзакцией.
+    """
+    if not product_ids:
+        return
+    await lock_category_tree(db)
+    await db.execute(listings_upsert(
+        ProductModel.id == any_(bindparam("product_ids", list(product_ids), type_=ARRAY(Integer)))))
+
+
+async def refresh_category_listings(db: AsyncSession, path: str) -> None:
+    """
+    Пересобирает строки модели чтения для всех товаров поддерева категории
+    с путём path — после перемещения или выключения категории.
+    Вызывать после lock_category_tree(db, exclusive=True).
+    """
+    await db.execute(listings_upsert(subtree_filter(path)))
+
+
+async def rebuild_product_listings(db: AsyncSession) -> int:
+    """
+    Полная пересборка модели чтения по всем товарам (commit выполняет вызывающий код).
+    Возвращает число записанных строк.
+    """
+    await lock_category_tree(db, exclusive=True)
+    result = await db.execute(listings_upsert(true()))
+    return result.rowcount
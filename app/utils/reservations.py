@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from typing import Sequence
+
+from sqlalchemy import Integer, column, func, insert, literal, select, update, values
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.products import Product as ProductModel
+from app.models.reservations import Reservation as ReservationModel, ReservationItem as ReservationItemModel
+from app.utils.change_log import record_changes
+from app.utils.read_model import refresh_product_listings
+from app.utils.response_cache import product_tag, response_cache
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE взаимоблокировки и конфликта сериализации в Postgres
+RETRYABLE_SQLSTATES = {"40P01", "40001"}
+
+products_table = ProductModel.__table__
+items_table = ReservationItemModel.__table__
+
+
+def is_retryable(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def reserve_stock(db: AsyncSession, reservation_id: int, items: Sequence[tuple[int, int]]) -> list[int]:
+    """
+    Списывает остатки по позициям (product_id, quantity) и записывает позиции резерва
+    одним выражением: условный UPDATE ... FROM (VALUES ...) с stock >= quantity
+    и INSERT из его RETURNING. Чтения остатка перед записью нет, поэтому
+    параллельные покупатели не могут продать больше, чем есть.
+    Возвращает ID товаров, которые удалось списать (commit выполняет вызывающий код).
+    """
+    requested = values(column("product_id", Integer), column("quantity", Integer),
+                       name="requested").data(list(items))
+    reserved = (
+        update(products_table)
+        .where(products_table.c.id == requested.c.product_id,
+               products_table.c.is_active == True,
+               products_table.c.stock >= requested.c.quantity)
+        .values(stock=products_table.c.stock - requested.c.quantity,
+                version=products_table.c.version + 1)
+        .returning(products_table.c.id, products_table.c.price, requested.c.quantity)
+        .cte("reserved")
+    )
+    stmt = (
+        insert(items_table)
+        .from_select(["reservation_id", "product_id", "quantity", "price"],
+                     select(literal(reservation_id), reserved.c.id, reserved.c.quantity, reserved.c.price))
+        .returning(items_table.c.product_id)
+    )
+    return list((await db.scalars(stmt)).all())
+
+
+async def restore_stock(db: AsyncSession, reservation_ids: Sequence[int]) -> list[int]:
+    """
+    Возвращает на склад остатки позиций указанных резервов одним UPDATE ... FROM.
+    Возвращает ID затронутых товаров (commit выполняет вызывающий код).
+    """
+    released = (
+        select(items_table.c.product_id, func.sum(items_table.c.quantity).label("quantity"))
+        .where(items_table.c.reservation_id.in_(reservation_ids))
+        .group_by(items_table.c.product_id)
+        .subquery()
+    )
+    result = await db.scalars(
+        update(products_table)
+        .where(products_table.c.id == released.c.product_id)
+        .values(stock=products_table.c.stock + released.c.quantity,
+                version=products_table.c.version + 1)
+        .returning(products_table.c.id)
+    )
+    return list(result.all())
+
+
+async def release_expired_reservations(db: AsyncSession, batch_size: int) -> tuple[int, list[int]]:
+    """
+    Помечает пачку просроченных резервов как expired и возвращает их остатки.
+    Возвращает (число освобождённых резервов, ID товаров с изменёнными остатками).
+    SKIP LOCKED позволяет нескольким воркерам чистить резервы параллельно.
+    """
+    expired_ids = (
+        select(ReservationModel.id)
+        .where(ReservationModel.status == "pending", ReservationModel.expires_at <= func.now())
+        .order_by(ReservationModel.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    reservation_ids = list((await db.scalars(
+        update(ReservationModel)
+        .where(ReservationModel.id.in_(expired_ids.scalar_subquery()), ReservationModel.status == "pending")
+        .values(status="expired")
+        .returning(ReservationModel.id)
+        .execution_options(synchronize_session=False)
+    )).all())
+    product_ids = []
+    if reservation_ids:
+        product_ids = await restore_stock(db, reservation_ids)
+        await record_changes(db, "product", product_ids, "update")
+        await refresh_product_listings(db, product_ids)
+    return len(reservation_ids), product_ids
+
+
+async def sweep_expired_reservations() -> int:
+    """
+    Освобождает все просроченные резервы пачками по RESERVATION_SWEEP_BATCH_SIZE.
+    """
+    total = 0
+    while True:
+        async with async_session_maker() as db:
+            released, product_ids = await release_expired_reservations(db, settings.RESERVATION_SWEEP_BATCH_SIZE)
+            await db.commit()
+        total += released
+        # Сбрасываются только карточки затронутых товаров, списки доживают свой TTL
+        await response_cache.invalidate(*map(product_tag, product_ids))
+        if released < settings.RESERVATION_SWEEP_BATCH_SIZE:
+            return total
+
+
+class ReservationSweeper:
+    """
+    Периодически освобождает просроченные резервы (запускается из lifespan приложения).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="reservation-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                released = await sweep_expired_reservations()
+                if released:
+                    logger.info("Освобождено просроченных резервов: %d", released)
+            except Exception:
+                logger.exception("Ошибка освобождения просроченных резервов")
+
+
+reservation_sweeper = ReservationSweeper(settings.RESERVATION_SWEEP_INTERVAL)
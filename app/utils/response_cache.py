@@ -0,0 +1,199 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, NamedTuple, Protocol
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.kv_store import KeyValueStore
+from app.utils.ttl_cache import TTLCache
+
+
+class CachedResponse(NamedTuple):
+    """
+    Готовое тело JSON-ответа и его ETag.
+    """
+    body: bytes
+    etag: str | None = None
+
+    def encode(self) -> bytes:
+        return (self.etag or "").encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        etag, _, body = raw.partition(b"\n")
+        return cls(body, etag.decode() or None)
+
+    def to_response(self, cache_control: str | None = None) -> Response:
+        headers = {}
+        if self.etag:
+            headers["ETag"] = self.etag
+            if cache_control:
+                headers["Cache-Control"] = cache_control
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class CacheBackend(Protocol):
+    """
+    Хранилище кэша ответов. Инвалидация реализована через «поколения» пространств
+    имён: ключи включают номер поколения, и его увеличение делает старые записи
+    недостижимыми без перебора ключей.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def generation(self, namespace: str) -> int: ...
+
+    async def bump(self, namespace: str) -> None: ...
+
+
+class MemoryBackend:
+    """
+    LRU-кэш в памяти процесса.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._entries = TTLCache(max_entries, ttl)
+        self._generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class SharedStoreBackend:
+    """
+    Кэш в общем хранилище (KeyValueStore): записи и поколения видны всем воркерам,
+    поэтому инвалидация из одного воркера действует во всех.
+    """
+
+    def __init__(self, store: KeyValueStore, prefix: str = "response-cache"):
+        self.store = store
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.store.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.store.set(f"{self.prefix}:{key}", value, ttl)
+
+    async def generation(self, namespace: str) -> int:
+        value = await self.store.get(f"{self.prefix}:generation:{namespace}")
+        return int(value) if value is not None else 0
+
+    async def bump(self, namespace: str) -> None:
+        await self.store.incr(f"{self.prefix}:generation:{namespace}")
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов GET-эндпоинтов с TTL, явной инвалидацией
+    и объединением одновременных промахов: пока один запрос загружает данные,
+    остальные с тем же ключом ждут его результат, а не идут в базу.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def get_or_load(self, namespace: str, key: str,
+                          loader: Callable[[], Awaitable[CachedResponse]],
+                          tags: Iterable[str] = ()) -> CachedResponse:
+        """
+        Возвращает ответ из кэша или загружает его. tags — дополнительные пространства
+        имён записи (например, product_tag(id)): запись сбрасывается инвалидацией
+        как namespace, так и любого из тегов.
+        """
+        if not self.enabled:
+            return await loader()
+
+        generations = [f"{namespace}:{await self.backend.generation(namespace)}"]
+        for tag in tags:
+            generations.append(f"{tag}:{await self.backend.generation(tag)}")
+        full_key = f"{'|'.join(generations)}:{key}"
+        raw = await self.backend.get(full_key)
+        if raw is not None:
+            self.hits += 1
+            return CachedResponse.decode(raw)
+
+        future = self._inflight.get(full_key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменён загружающий запрос, а не текущий — загружаем сами
+                if not future.cancelled():
+                    raise
+                return await loader()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            # Ошибки (например, 404) не кэшируются, но передаются ожидающим запросам
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            await self.backend.set(full_key, value.encode(), self.ttl)
+            return value
+        finally:
+            self._inflight.pop(full_key, None)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """
+        Сбрасывает все записи указанных пространств имён (или тегов, см. get_or_load).
+        """
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            await self.backend.bump(namespace)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "inflight": len(self._inflight)}
+
+
+def product_tag(product_id: int) -> str:
+    """
+    Тег записей кэша, зависящих от одного товара (карточка товара).
+    Изменение остатков сбрасывает только их, а страницы списков доживают свой короткий TTL.
+    """
+    return f"product:{product_id}"
+
+
+def cache_key(request: Request) -> str:
+    """
+    Ключ кэша: путь и отсортированные параметры запроса.
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+response_cache = ResponseCache(
+    MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL),
+    ttl=settings.RESPONSE_CACHE_TTL,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
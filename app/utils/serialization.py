@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Sequence
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+
+class RowSerializer:
+    """
+    Быстрая сериализация списков: выбираются только колонки схемы ответа,
+    строки-кортежи сразу кодируются orjson в байты JSON без создания
+    ORM-объектов и без валидации каждой строки через Pydantic.
+    Поля и их порядок совпадают со схемой, поэтому формат ответа не меняется.
+    """
+
+    def __init__(self, schema: type[BaseModel], model: Any, fields: tuple[str, ...] | None = None):
+        self.schema = schema
+        self.model = model
+        self.fields = fields if fields is not None else tuple(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+        self._projections: dict[tuple[str, ...], RowSerializer] = {}
+
+    def project(self, fields: tuple[str, ...] | None) -> "RowSerializer":
+        """
+        Сериализатор только для полей fields (см. parse_fields), создаётся один раз на набор полей.
+        None — все поля схемы.
+        """
+        if fields is None or fields == self.fields:
+            return self
+        projection = self._projections.get(fields)
+        if projection is None:
+            projection = self._projections[fields] = RowSerializer(self.schema, self.model, fields)
+        return projection
+
+    def select_columns(self, *extra: Any) -> list:
+        """
+        Колонки для SELECT: поля ответа, затем служебные колонки (курсор, проверка
+        категории), если их нет среди полей. Лишние колонки в конце строки
+        items() не видит — zip останавливается на последнем поле.
+        """
+        return self.columns + [column for column in extra if column.key not in self.fields]
+
+    def items(self, rows: Iterable[Row | Sequence]) -> list[dict]:
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    def dumps(self, rows: Iterable[Row | Sequence]) -> bytes:
+        return orjson.dumps(self.items(rows))
+
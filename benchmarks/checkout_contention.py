@@ -0,0 +1,98 @@
+"""
+Конкурентное резервирование одного «горячего» товара.
+
+Сотни покупателей одновременно резервируют по одной единице товара --product-id
+(каждый запрос со своим Idempotency-Key). Скрипт печатает задержки успешных
+резервов и отказов (409) и проверяет, что списано ровно столько, сколько
+резервов создано: остаток до - остаток после == число успешных резервов.
+С --release созданные резервы затем отменяются и остаток восстанавливается.
+
+Покупатели берутся из benchmarks.datagen (buyer1@bench.local ...):
+
+    python -m benchmarks.checkout_contention --product-id 1 --buyers 300 --requests 3
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stats import summarize
+
+
+async def _login(client: httpx.AsyncClient, number: int, password: str) -> str:
+    response = await client.post("/users/token", data={"username": f"buyer{number}@bench.local",
+                                                       "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _stock(client: httpx.AsyncClient, product_id: int) -> int:
+    # Резервирование сбрасывает кэш ответов товаров, поэтому остаток актуален
+    response = await client.get(f"/products/{product_id}")
+    response.raise_for_status()
+    return response.json()["stock"]
+
+
+async def _buyer(client: httpx.AsyncClient, token: str, args: argparse.Namespace, start: asyncio.Event,
+                 results: dict) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    await start.wait()
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        response = await client.post("/reservations/", json={"items": [{"product_id": args.product_id, "quantity": 1}]},
+                                     headers={**headers, "Idempotency-Key": uuid.uuid4().hex})
+        elapsed = time.perf_counter() - started
+        if response.status_code == 201:
+            results["reserved"].append(elapsed)
+            results["ids"].append((response.json()["id"], headers))
+        elif response.status_code == 409:
+            results["sold_out"].append(elapsed)
+        else:
+            results["errors"] += 1
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.buyers)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        tokens = await asyncio.gather(*[_login(client, n, args.password) for n in range(1, args.buyers + 1)])
+        stock_before = await _stock(client, args.product_id)
+
+        results = {"reserved": [], "sold_out": [], "errors": 0, "ids": []}
+        start = asyncio.Event()
+        buyers = [asyncio.create_task(_buyer(client, token, args, start, results)) for token in tokens]
+        started = time.monotonic()
+        start.set()
+        await asyncio.gather(*buyers)
+        elapsed = time.monotonic() - started
+
+        stock_after = await _stock(client, args.product_id)
+        report = {
+            "buyers": args.buyers,
+            "stock_before": stock_before,
+            "stock_after": stock_after,
+            "reserved": summarize(results["reserved"], elapsed),
+            "sold_out": summarize(results["sold_out"], elapsed),
+            "errors": results["errors"],
+            "consistent": stock_before - stock_after == len(results["reserved"]),
+        }
+
+        if args.release:
+            await asyncio.gather(*[client.post(f"/reservations/{reservation_id}/release", headers=headers)
+                                   for reservation_id, headers in results["ids"]])
+            report["stock_after_release"] = await _stock(client, args.product_id)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--product-id", type=int, required=True)
+    parser.add_argument("--buyers", type=int, default=300, help="Параллельных покупателей")
+    parser.add_argument("--requests", type=int, default=3, help="Резервов на покупателя")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--release", action="store_true", help="Отменить созданные резервы в конце")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""
+Сравнение двух прогонов benchmarks.load.
+
+Для каждого сценария печатает изменение rps и p50/p95/p99. Если p95 или p99
+выросли (или rps упал) больше чем на --threshold процентов, сценарий
+помечается как регрессия и команда завершается с кодом 1 — удобно для CI.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/head.json
+"""
+import argparse
+import json
+import sys
+
+# Метрика -> True, если рост значения — это ухудшение
+METRICS = {"rps": False, "p50_ms": True, "p95_ms": True, "p99_ms": True}
+# По этим метрикам решаем, есть ли регрессия (p50 слишком шумный)
+GATED = ("rps", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    if before == 0:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Печатает таблицу сравнения и возвращает список сценариев с регрессией.
+    """
+    regressions = []
+    print(f"{'scenario':<22}" + "".join(f"{metric:>24}" for metric in METRICS))
+    for name, after in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<22} нет в базовом прогоне")
+            continue
+        cells, regressed = [], False
+        for metric, higher_is_worse in METRICS.items():
+            change = _change(before[metric], after[metric])
+            worse = change > threshold if higher_is_worse else change < -threshold
+            regressed |= worse and metric in GATED
+            cells.append(f"{before[metric]} -> {after[metric]} ({change:+.1f}%){'!' if worse else ' '}")
+        if after.get("errors", 0) > before.get("errors", 0):
+            regressed = True
+        print(f"{name:<22}" + "".join(f"{cell:>24}" for cell in cells))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="JSON базового прогона")
+    parser.add_argument("current", help="JSON нового прогона")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимое ухудшение, %%")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    print(f"base: {baseline['meta'].get('commit')}  head: {current['meta'].get('commit')}")
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"Регрессия (> {args.threshold}%): {', '.join(regressions)}")
+        sys.exit(1)
+    print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
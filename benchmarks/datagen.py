@@ -0,0 +1,205 @@
+"""
+Генератор синтетических данных для нагрузочных тестов.
+
+Создаёт глубокое дерево категорий (с материализованными путями), пользователей,
+товары и отзывы и загружает их в Postgres через COPY (asyncpg
+copy_records_to_table). Денормализованные поля остаются согласованными:
+счётчики рейтинга товара считаются по сгенерированным активным отзывам,
+version = 1, пути категорий строятся так же, как child_path.
+Генерация детерминирована при одинаковом --seed.
+
+Все пользователи получают пароль --password (хэш считается один раз).
+Модель чтения product_listings заполняется после загрузки тем же запросом,
+что и команда rebuild-listings.
+
+Запуск (схема уже создана через alembic upgrade head):
+
+    python -m benchmarks.datagen --truncate --products 1000000 --reviews-per-product 5
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+
+WORDS = ("телефон", "ноутбук", "наушники", "чайник", "кофемашина", "пылесос", "монитор",
+         "клавиатура", "рюкзак", "кроссовки", "куртка", "лампа", "стол", "кресло", "книга",
+         "смартфон", "планшет", "колонка", "часы", "фотоаппарат")
+ADJECTIVES = ("беспроводной", "компактный", "мощный", "игровой", "детский", "складной",
+              "водонепроницаемый", "умный", "классический", "профессиональный")
+
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "image_url", "stock", "is_active",
+                   "category_id", "seller_id", "rating", "version", "rating_sum", "rating_count",
+                   "grade_1_count", "grade_2_count", "grade_3_count", "grade_4_count", "grade_5_count")
+REVIEW_COLUMNS = ("id", "user_id", "product_id", "comment", "comment_date", "grade", "is_active")
+
+# Распределение оценок: отзывы в магазинах смещены к высоким оценкам
+GRADE_WEIGHTS = (5, 7, 15, 30, 43)
+
+
+def asyncpg_dsn(url: str) -> str:
+    """
+    URL SQLAlchemy (postgresql+asyncpg://...) -> DSN для asyncpg.
+    """
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def generate_categories(count: int, fanout: int, inactive_ratio: float, rng: random.Random) -> list[tuple]:
+    """
+    Дерево категорий обходом в ширину: у каждой категории до fanout детей,
+    глубина растёт вместе с count. Возвращает записи (id, name, parent_id, is_active, path).
+    """
+    records = []
+    queue: list[tuple[int | None, str]] = [(None, "/")]
+    next_id = 1
+    while next_id <= count:
+        parent_id, parent_path = queue.pop(0)
+        children = fanout if parent_id is not None else max(fanout, 2)
+        for _ in range(children):
+            if next_id > count:
+                break
+            path = f"{parent_path}{next_id}/"
+            is_active = rng.random() >= inactive_ratio
+            records.append((next_id, f"Категория {next_id}", parent_id, is_active, path))
+            queue.append((next_id, path))
+            next_id += 1
+    return records
+
+
+def generate_deep_chain(start_id: int, depth: int) -> list[tuple]:
+    """
+    Отдельная цепочка глубиной depth — худший случай для операций с поддеревом.
+    """
+    records = []
+    parent_id, path = None, "/"
+    for category_id in range(start_id, start_id + depth):
+        path = f"{path}{category_id}/"
+        records.append((category_id, f"Глубокая категория {category_id}", parent_id, True, path))
+        parent_id = category_id
+    return records
+
+
+def generate_users(sellers: int, buyers: int, password_hash: str) -> list[tuple]:
+    """
+    Продавцы получают id 1..sellers, покупатели — следующие buyers id.
+    """
+    records = [(user_id, f"seller{user_id}@bench.local", password_hash, True, "seller")
+               for user_id in range(1, sellers + 1)]
+    records += [(sellers + n, f"buyer{n}@bench.local", password_hash, True, "buyer")
+                for n in range(1, buyers + 1)]
+    return records
+
+
+def generate_chunk(first_id: int, last_id: int, args: argparse.Namespace, category_ids: list[int],
+                   review_id: int, rng: random.Random) -> tuple[list[tuple], list[tuple], int]:
+    """
+    Товары first_id..last_id и их отзывы. Счётчики рейтинга считаются по активным отзывам.
+    """
+    products, reviews = [], []
+    buyer_ids = range(args.sellers + 1, args.sellers + args.buyers + 1)
+    now = datetime.now()
+    for product_id in range(first_id, last_id + 1):
+        review_count = min(rng.randint(0, 2 * args.reviews_per_product), args.buyers)
+        grades = [0] * 5
+        rating_sum = rating_count = 0
+        for user_id in rng.sample(buyer_ids, review_count):
+            grade = rng.choices((1, 2, 3, 4, 5), GRADE_WEIGHTS)[0]
+            is_active = rng.random() >= 0.05
+            comment_date = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            reviews.append((review_id, user_id, product_id, f"Отзыв {review_id}", comment_date, grade, is_active))
+            review_id += 1
+            if is_active:
+                grades[grade - 1] += 1
+                rating_sum += grade
+                rating_count += 1
+
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(WORDS)} {product_id}".capitalize()
+        rating = round(rating_sum / rating_count, 2) if rating_count else 0.0
+        products.append((
+            product_id, name, f"{name}: описание для нагрузочного теста",
+            round(rng.uniform(10, 100_000), 2), None, rng.randint(0, 500), rng.random() >= 0.02,
+            rng.choice(category_ids), rng.randint(1, args.sellers), rating, 1,
+            rating_sum, rating_count, *grades,
+        ))
+    return products, reviews, review_id
+
+
+def listings_sql() -> str:
+    """
+    SQL полной пересборки product_listings (app/utils/read_model.py) для asyncpg.
+    """
+    from sqlalchemy import true
+    from sqlalchemy.dialects import postgresql
+
+    from app.utils.read_model import listings_upsert
+
+    return str(listings_upsert(true()).compile(dialect=postgresql.dialect(),
+                                                 compile_kwargs={"literal_binds": True}))
+
+
+async def reset_sequences(conn: asyncpg.Connection, tables: tuple[str, ...]) -> None:
+    for table in tables:
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"coalesce((SELECT max(id) FROM {table}), 0) + 1, false)"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    from app.auth import hash_password
+    from app.config import settings
+
+    rng = random.Random(args.seed)
+    conn = await asyncpg.connect(asyncpg_dsn(args.database_url or settings.DATABASE_URL))
+    started = time.monotonic()
+    try:
+        if args.truncate:
+            await conn.execute("TRUNCATE product_listings, reviews, products, categories, users, change_log "
+                               "RESTART IDENTITY CASCADE")
+
+        users = generate_users(args.sellers, args.buyers, hash_password(args.password))
+        await conn.copy_records_to_table("users", records=users,
+                                         columns=("id", "email", "hashed_password", "is_active", "role"))
+
+        categories = generate_categories(args.categories, args.fanout, args.inactive_ratio, rng)
+        categories += generate_deep_chain(len(categories) + 1, args.deep_chain)
+        await conn.copy_records_to_table("categories", records=categories,
+                                         columns=("id", "name", "parent_id", "is_active", "path"))
+        print(f"users: {len(users)}, categories: {len(categories)}")
+
+        category_ids = [record[0] for record in categories]
+        review_id = 1
+        for first_id in range(1, args.products + 1, args.chunk_size):
+            last_id = min(first_id + args.chunk_size - 1, args.products)
+            products, reviews, review_id = generate_chunk(first_id, last_id, args, category_ids, review_id, rng)
+            await conn.copy_records_to_table("products", records=products, columns=PRODUCT_COLUMNS)
+            await conn.copy_records_to_table("reviews", records=reviews, columns=REVIEW_COLUMNS)
+            print(f"products: {last_id}/{args.products}, reviews: {review_id - 1}")
+
+        await reset_sequences(conn, ("users", "categories", "products", "reviews"))
+        await conn.execute(listings_sql())
+        print("product_listings заполнена")
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+    print(f"Готово за {time.monotonic() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="По умолчанию DATABASE_URL из настроек приложения")
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед загрузкой")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--categories", type=int, default=2000)
+    parser.add_argument("--fanout", type=int, default=4, help="Детей у каждой категории")
+    parser.add_argument("--deep-chain", type=int, default=50, help="Длина отдельной глубокой цепочки категорий")
+    parser.add_argument("--inactive-ratio", type=float, default=0.02, help="Доля неактивных категорий")
+    parser.add_argument("--sellers", type=int, default=1000)
+    parser.add_argument("--buyers", type=int, default=50000)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--reviews-per-product", type=int, default=5, help="Среднее число отзывов на товар")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Товаров в одном COPY")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,204 @@
+"""
+Нагрузочный прогон по эндпоинтам всех роутеров.
+
+Каждый сценарий по очереди нагружается --concurrency параллельными клиентами
+в течение --duration секунд; для каждого считаются пропускная способность и
+p50/p95/p99. Результат сохраняется в JSON (вместе с коммитом), чтобы сравнивать
+прогоны между коммитами через benchmarks.compare.
+
+Запуск (приложение поднято, данные загружены benchmarks.datagen):
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.load --scenario products_list --scenario product_detail
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+import httpx
+
+from benchmarks.stats import summarize
+
+SEARCH_WORDS = ("телефон", "ноутбук", "наушники", "чайник", "монитор", "кресло", "книга", "часы")
+
+
+class Dataset:
+    """
+    Идентификаторы, по которым строятся запросы; определяются по самому API.
+    """
+
+    def __init__(self, category_ids: list[int], max_product_id: int, credentials: dict | None):
+        self.category_ids = category_ids
+        self.max_product_id = max_product_id
+        self.credentials = credentials
+
+    @classmethod
+    async def discover(cls, client: httpx.AsyncClient, args: argparse.Namespace) -> "Dataset":
+        categories = (await client.get("/categories/")).json()
+        page = (await client.get("/products/", params={"sort": "-id", "limit": 1})).json()
+        max_product_id = page["items"][0]["id"] if page["items"] else 1
+        credentials = {"username": args.email, "password": args.password} if args.email else None
+        return cls([category["id"] for category in categories] or [1], max_product_id, credentials)
+
+    def product_id(self) -> int:
+        return random.randint(1, self.max_product_id)
+
+
+# Сценарий: функция (dataset) -> (метод, путь, параметры httpx)
+Request = tuple[str, str, dict]
+
+
+def _products_list(data: Dataset) -> Request:
+    sort = random.choice(("id", "-price", "-rating"))
+    return "GET", "/products/", {"params": {"limit": 20, "sort": sort}}
+
+
+def _products_list_sparse(data: Dataset) -> Request:
+    # Карточки листинга: только поля, которые показываются в сетке товаров
+    sort = random.choice(("id", "-price", "-rating"))
+    return "GET", "/products/", {"params": {"limit": 20, "sort": sort, "fields": "name,price,image_url,rating"}}
+
+
+def _products_filtered(data: Dataset) -> Request:
+    low = random.randint(10, 50_000)
+    return "GET", "/products/", {"params": {"limit": 20, "min_price": low, "max_price": low + 5000,
+                                            "category_id": random.choice(data.category_ids)}}
+
+
+def _product_detail(data: Dataset) -> Request:
+    return "GET", f"/products/{data.product_id()}", {}
+
+
+def _products_batch(data: Dataset) -> Request:
+    # Корзина из 50 позиций одним запросом
+    ids = ",".join(str(data.product_id()) for _ in range(50))
+    return "GET", "/products/batch", {"params": {"ids": ids}}
+
+
+def _products_by_category(data: Dataset) -> Request:
+    return "GET", f"/products/category/{random.choice(data.category_ids)}", {
+        "params": {"include_descendants": "true"}}
+
+
+def _products_search(data: Dataset) -> Request:
+    return "GET", "/products/search", {"params": {"q": random.choice(SEARCH_WORDS), "limit": 20}}
+
+
+def _categories_list(data: Dataset) -> Request:
+    return "GET", "/categories/", {}
+
+
+def _product_reviews(data: Dataset) -> Request:
+    return "GET", f"/reviews/{data.product_id()}/reviews/", {}
+
+
+def _reviews_list(data: Dataset) -> Request:
+    return "GET", "/reviews/", {}
+
+
+def _login(data: Dataset) -> Request:
+    return "POST", "/users/token", {"data": data.credentials}
+
+
+SCENARIOS: dict[str, Callable[[Dataset], Request]] = {
+    "categories_list": _categories_list,
+    "products_list": _products_list,
+    "products_list_sparse": _products_list_sparse,
+    "products_filtered": _products_filtered,
+    "product_detail": _product_detail,
+    "products_batch": _products_batch,
+    "products_by_category": _products_by_category,
+    "products_search": _products_search,
+    "product_reviews": _product_reviews,
+    "reviews_list": _reviews_list,
+    "users_login": _login,
+}
+
+
+async def _worker(client: httpx.AsyncClient, scenario: Callable[[Dataset], Request], data: Dataset,
+                  deadline: float, latencies: list[float]) -> int:
+    errors = 0
+    while time.monotonic() < deadline:
+        method, path, kwargs = scenario(data)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            errors += response.status_code >= 400
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    return errors
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, data: Dataset, args: argparse.Namespace) -> dict:
+    scenario = SCENARIOS[name]
+    # Прогрев: кэши, пул соединений, планы запросов
+    warmup_deadline = time.monotonic() + args.warmup
+    await asyncio.gather(*[_worker(client, scenario, data, warmup_deadline, []) for _ in range(args.concurrency)])
+
+    latencies: list[float] = []
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+    errors = await asyncio.gather(*[_worker(client, scenario, data, deadline, latencies)
+                                    for _ in range(args.concurrency)])
+    return summarize(latencies, time.monotonic() - started, sum(errors))
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    names = args.scenario or [name for name in SCENARIOS if name != "users_login" or args.email]
+    random.seed(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        data = await Dataset.discover(client, args)
+        for name in names:
+            result = await run_scenario(client, name, data, args)
+            report["scenarios"][name] = result
+            print(f"{name:<22} {result['rps']:>9} rps  p50 {result['p50_ms']:>8} ms  "
+                  f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"Результат сохранён в {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Сценарий (можно несколько раз); по умолчанию все")
+    parser.add_argument("--concurrency", type=int, default=32, help="Параллельных клиентов")
+    parser.add_argument("--duration", type=float, default=20.0, help="Длительность замера сценария, с")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Прогрев перед замером, с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--email", help="Пользователь для сценария users_login, например seller1@bench.local "
+                                        "(на сервере нужен RATE_LIMIT_ENABLED=false)")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--output", help="Куда сохранить JSON с результатами")
+    asyncio.run(main(parser.parse_args()))
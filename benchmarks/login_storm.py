@@ -0,0 +1,80 @@
+"""
+Задержка посторонних эндпоинтов во время «шторма» логинов.
+
+Сначала замеряется фоновая задержка probe-эндпоинта без нагрузки, затем —
+во время параллельных POST /users/token. Пока bcrypt выполнялся прямо в
+event loop, p99 probe-запросов во второй фазе вырастал до сотен миллисекунд.
+
+Запуск (приложение и база уже подняты, пользователь существует; лимит частоты
+входа отключён через RATE_LIMIT_ENABLED=false, иначе большинство логинов получат 429):
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.login_storm --email buyer@example.com --password secret123
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.stats import summarize
+
+
+async def _probe(client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float]) -> int:
+    errors = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code >= 400
+    return errors
+
+
+async def _login(client: httpx.AsyncClient, credentials: dict, deadline: float, latencies: list[float]) -> int:
+    errors = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/users/token", data=credentials)
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+    return errors
+
+
+async def _phase(client: httpx.AsyncClient, args: argparse.Namespace, logins: int) -> dict:
+    deadline = time.monotonic() + args.duration
+    credentials = {"username": args.email, "password": args.password}
+    probe_latencies: list[float] = []
+    login_latencies: list[float] = []
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *[_probe(client, args.probe_path, deadline, probe_latencies) for _ in range(args.probes)],
+        *[_login(client, credentials, deadline, login_latencies) for _ in range(logins)],
+    )
+    elapsed = time.monotonic() - started
+    report = {"probe": summarize(probe_latencies, elapsed, sum(results[:args.probes]))}
+    if logins:
+        report["login"] = summarize(login_latencies, elapsed, sum(results[args.probes:]))
+    return report
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.probes + args.logins)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        report = {
+            "baseline": await _phase(client, args, logins=0),
+            "storm": await _phase(client, args, logins=args.logins),
+        }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--probe-path", default="/categories/", help="Эндпоинт, задержку которого замеряем")
+    parser.add_argument("--probes", type=int, default=4, help="Параллельных probe-клиентов")
+    parser.add_argument("--logins", type=int, default=50, help="Параллельных клиентов логина")
+    parser.add_argument("--duration", type=float, default=15.0, help="Длительность каждой фазы, с")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+"""
+Проверка планов запросов роутеров на загруженных данных.
+
+Приложение запускается в том же процессе (httpx.ASGITransport), для каждого
+сценария benchmarks.load выполняется несколько запросов, а все SELECT,
+которые при этом ушли в базу, перехватываются и прогоняются через
+EXPLAIN (FORMAT JSON) с теми же параметрами. Если в плане есть Seq Scan
+по одной из проверяемых таблиц, сценарий считается регрессией и команда
+завершается с кодом 1 — удобно для CI после миграций.
+
+На пустой базе планировщик законно выбирает Seq Scan, поэтому запускать
+нужно на данных benchmarks.datagen (после ANALYZE):
+
+    python -m benchmarks.plans
+    python -m benchmarks.plans --scenario product_reviews --verbose
+
+В CI планы проверяются тестами tests/test_query_plans.py на небольшом наборе данных.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.load import SCENARIOS, Dataset
+
+# Большие таблицы, по которым последовательное чтение недопустимо
+CHECKED_TABLES = ("products", "product_listings", "reviews")
+
+
+def _seq_scans(plan: dict, tables: set[str]) -> list[str]:
+    """
+    Таблицы проверяемого набора, которые план читает последовательно.
+    """
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found += _seq_scans(child, tables)
+    return found
+
+
+class StatementRecorder:
+    """
+    Собирает SELECT, выполненные через engine, пока включена запись.
+    """
+
+    def __init__(self):
+        self.statements: list[tuple[str, tuple]] = []
+        self.recording = False
+
+    def install(self, engine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((statement, tuple(parameters or ())))
+
+
+async def explain(engine, statement: str, parameters: tuple, enable_seqscan: bool = True) -> dict:
+    """
+    План выражения. С enable_seqscan=False планировщик выбирает Seq Scan, только если
+    подходящего индекса нет, — так индексы проверяются и на маленьких таблицах.
+    """
+    async with engine.connect() as conn:
+        if not enable_seqscan:
+            # SET LOCAL действует до конца транзакции, которая откатывается при закрытии соединения
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        document = result.scalar_one()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]["Plan"]
+
+
+async def main(args: argparse.Namespace) -> int:
+    from app.database import async_engine, read_engine
+    from app.main import app
+    from app.utils.response_cache import response_cache
+
+    # Ответы из кэша не доходят до базы — отключаем кэш на время проверки
+    response_cache.enabled = False
+    recorder = StatementRecorder()
+    engines = {async_engine, read_engine}
+    for engine in engines:
+        recorder.install(engine)
+
+    random.seed(args.seed)
+    tables = set(args.table or CHECKED_TABLES)
+    names = args.scenario or [name for name in SCENARIOS if name != "users_login"]
+    failed = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+        data = await Dataset.discover(client, argparse.Namespace(email=None, password=None))
+        for name in names:
+            recorder.statements.clear()
+            recorder.recording = True
+            for _ in range(args.samples):
+                method, path, kwargs = SCENARIOS[name](data)
+                await client.request(method, path, **kwargs)
+            recorder.recording = False
+
+            # Одно выражение с разными параметрами проверяем по первому вызову
+            unique: dict[str, tuple] = {}
+            for statement, parameters in recorder.statements:
+                unique.setdefault(statement, parameters)
+
+            problems = []
+            for statement, parameters in unique.items():
+                plan = await explain(read_engine, statement, parameters)
+                scans = _seq_scans(plan, tables)
+                if scans:
+                    problems.append((statement, scans))
+                if args.verbose:
+                    print(f"--- {name}\n{statement}\n{json.dumps(plan, indent=2, ensure_ascii=False)}")
+
+            status = "OK" if not problems else "SEQ SCAN"
+            print(f"{name:<22} запросов {len(unique):>3}  {status}")
+            for statement, scans in problems:
+                print(f"    {', '.join(sorted(set(scans)))}: {' '.join(statement.split())[:200]}")
+            if problems:
+                failed.append(name)
+
+    for engine in engines:
+        await engine.dispose()
+    if failed:
+        print(f"Seq Scan в сценариях: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Сценарий (можно несколько раз); по умолчанию все, кроме users_login")
+    parser.add_argument("--table", action="append",
+                        help=f"Проверяемая таблица (можно несколько раз); по умолчанию {', '.join(CHECKED_TABLES)}")
+    parser.add_argument("--samples", type=int, default=3, help="Запросов на сценарий (параметры случайные)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Печатать планы целиком")
+    sys.exit(asyncio.run(main(parser.parse_args())))
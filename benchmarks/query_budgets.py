@@ -0,0 +1,94 @@
+"""
+Бюджеты SQL-запросов на эндпоинт.
+
+Приложение запускается в том же процессе (httpx.ASGITransport), для каждого
+сценария benchmarks.load выполняется несколько запросов внутри count_queries.
+Если какой-либо запрос выполнил больше SQL-выражений, чем записано в BUDGETS,
+сценарий считается регрессией (N+1, лишний refresh и т.п.) и команда
+завершается с кодом 1 — удобно для CI.
+
+Кэш ответов отключается, а первый запрос сценария не учитывается: он может
+загрузить снимок дерева категорий. Нужна база с данными benchmarks.datagen:
+
+    python -m benchmarks.query_budgets
+    python -m benchmarks.query_budgets --scenario product_reviews --samples 20
+
+Те же бюджеты проверяются в CI тестами tests/test_query_stats.py на небольшом наборе данных.
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+import httpx
+
+from benchmarks.load import SCENARIOS, Dataset
+
+# Сценарий -> максимум SQL-выражений на один HTTP-запрос
+BUDGETS = {
+    "categories_list": 0,
+    "products_list": 1,
+    "products_list_sparse": 1,
+    "products_filtered": 1,
+    "product_detail": 1,
+    "products_batch": 1,
+    "products_by_category": 1,
+    "products_search": 1,
+    # Версия товара для ETag и страница отзывов
+    "product_reviews": 2,
+    "reviews_list": 1,
+}
+
+
+async def main(args: argparse.Namespace) -> int:
+    from app.database import async_engine, read_engine
+    from app.main import app
+    from app.middleware.query_stats import count_queries
+    from app.utils.response_cache import response_cache
+
+    response_cache.enabled = False
+    random.seed(args.seed)
+    names = args.scenario or list(BUDGETS)
+    failed = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://budgets") as client:
+        data = await Dataset.discover(client, argparse.Namespace(email=None, password=None))
+        for name in names:
+            scenario, budget = SCENARIOS[name], BUDGETS[name]
+            method, path, kwargs = scenario(data)
+            await client.request(method, path, **kwargs)
+
+            worst, worst_path = 0, None
+            for _ in range(args.samples):
+                method, path, kwargs = scenario(data)
+                with count_queries() as stats:
+                    response = await client.request(method, path, **kwargs)
+                if response.status_code >= 500:
+                    print(f"{name}: {method} {path} -> {response.status_code}")
+                    failed.append(name)
+                    break
+                if stats.count > worst:
+                    worst, worst_path = stats.count, f"{method} {path}"
+
+            status = "OK" if worst <= budget else "ПРЕВЫШЕН"
+            print(f"{name:<22} максимум {worst:>3} / бюджет {budget:>3}  {status}")
+            if worst > budget:
+                print(f"    {worst_path}")
+                if name not in failed:
+                    failed.append(name)
+
+    for engine in {async_engine, read_engine}:
+        await engine.dispose()
+    if failed:
+        print(f"Бюджет SQL-запросов нарушен в сценариях: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(BUDGETS),
+                        help="Сценарий (можно несколько раз); по умолчанию все")
+    parser.add_argument("--samples", type=int, default=5, help="Запросов на сценарий (параметры случайные)")
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
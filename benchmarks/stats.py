@@ -0,0 +1,27 @@
+import math
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Перцентиль q (0-100) по уже отсортированному списку (метод nearest-rank).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """
+    Сводка по замерам задержки (в секундах): пропускная способность и перцентили в миллисекундах.
+    """
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
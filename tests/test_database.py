@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.database import PoolWaitStats, TimedQueuePool
+
+pytestmark = pytest.mark.anyio
+
+
+def make_pool(pool_size: int, max_overflow: int) -> TimedQueuePool:
+    pool_class = type("TestPool", (TimedQueuePool,), {"stats": PoolWaitStats()})
+    return pool_class(lambda: sqlite3.connect(":memory:", check_same_thread=False),
+                      pool_size=pool_size, max_overflow=max_overflow, timeout=0.1)
+
+
+async def test_checkouts_without_blocking_are_not_waits():
+    pool = make_pool(pool_size=1, max_overflow=1)
+    first = await greenlet_spawn(pool.connect)
+    # Второе соединение создаётся в пределах переполнения — это не ожидание
+    second = await greenlet_spawn(pool.connect)
+    second.close()
+    third = await greenlet_spawn(pool.connect)
+    assert pool.stats.waits == 0
+    first.close()
+    third.close()
+    pool.dispose()
+
+
+async def test_exhausted_pool_records_wait_and_timeout():
+    pool = make_pool(pool_size=1, max_overflow=0)
+    first = await greenlet_spawn(pool.connect)
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    assert pool.stats.waits == 1
+    assert pool.stats.timeouts == 1
+    assert pool.stats.max_wait_seconds >= 0.1
+    first.close()
+    pool.dispose()
@@ -0,0 +1,51 @@
+import pytest
+
+from app.utils.import_stream import iter_csv_rows, iter_lines, iter_ndjson_rows
+
+pytestmark = pytest.mark.anyio
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(rows) -> list:
+    return [row async for row in rows]
+
+
+async def test_lines_split_across_chunks():
+    lines = await collect(iter_lines(stream(b"ab", b"c\r\nd", b"e\nf"), max_length=10))
+    assert lines == ["abc", "de", "f"]
+
+
+async def test_long_line_is_dropped_without_buffering():
+    # Без перевода строки хвост не растёт дальше лимита: строка заменяется на None
+    chunks = [b"x" * 8] * 100 + [b"\nok\n"]
+    lines = await collect(iter_lines(stream(*chunks), max_length=16))
+    assert lines == [None, "ok"]
+
+
+async def test_long_line_inside_chunk():
+    lines = await collect(iter_lines(stream(b"short\n" + b"y" * 20 + b"\nnext"), max_length=10))
+    assert lines == ["short", None, "next"]
+
+
+async def test_ndjson_reports_long_line_and_resyncs():
+    body = b'{"a": 1}\n{"b": "' + b"z" * 100 + b'"}\n{"c": 3}\n'
+    rows = await collect(iter_ndjson_rows(stream(body), max_line_length=50))
+    assert rows == [(1, {"a": 1}, None), (2, None, "Строка длиннее 50 символов"), (3, {"c": 3}, None)]
+
+
+async def test_csv_quoted_newlines():
+    body = b'name,description\nlamp,"two\nlines"\n'
+    rows = await collect(iter_csv_rows(stream(body), max_record_length=100))
+    assert rows == [(1, {"name": "lamp", "description": "two\nlines"}, None)]
+
+
+async def test_csv_unclosed_quote_is_bounded():
+    lines = [b'name,description\n', b'lamp,"never closed\n'] + [b"filler line\n"] * 20
+    rows = await collect(iter_csv_rows(stream(*lines), max_record_length=64))
+    assert rows[0] == (1, None, "Запись длиннее 64 символов")
+    # После сброса разбор продолжается со следующей строки
+    assert all(error is None or "колонок" in error for _, _, error in rows[1:])
@@ -0,0 +1,27 @@
+import httpx
+import pytest
+
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def api():
+    """
+    Клиент без базы: проверки ниже отклоняют запрос до обращения к ней.
+    """
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize("ids", ["1,2147483648", "0", "99999999999999999999"])
+async def test_batch_get_rejects_ids_outside_integer_range(api, ids):
+    response = await api.get("/products/batch", params={"ids": ids})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("ids", [[1, 2**31], [0], [-5]])
+async def test_batch_post_rejects_ids_outside_integer_range(api, ids):
+    response = await api.post("/products/batch", json={"ids": ids})
+    assert response.status_code == 422
@@ -0,0 +1,86 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.load import SCENARIOS, Dataset
+from benchmarks.plans import CHECKED_TABLES, StatementRecorder, _seq_scans, explain
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def recorder(client):
+    """
+    Перехватывает SELECT, выполненные приложением во время теста.
+    """
+    from sqlalchemy import event
+
+    from app.database import async_engine, read_engine
+
+    recorder = StatementRecorder()
+    engines = {async_engine, read_engine}
+    for engine in engines:
+        recorder.install(engine)
+    yield recorder
+    for engine in engines:
+        event.remove(engine.sync_engine, "before_cursor_execute", recorder._before_execute)
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+async def _plans(recorder: StatementRecorder, client, method: str, path: str, **kwargs) -> list[tuple[str, dict]]:
+    """
+    Выполняет запрос к приложению и возвращает планы его SELECT.
+    Seq Scan отключён: на маленьком наборе данных он законно дешевле индекса,
+    а так в плане остаётся только там, где подходящего индекса нет.
+    """
+    from app.database import read_engine
+
+    recorder.statements.clear()
+    recorder.recording = True
+    response = await client.request(method, path, **kwargs)
+    recorder.recording = False
+    assert response.status_code < 500, f"{method} {path}: {response.status_code}"
+
+    unique: dict[str, tuple] = {}
+    for statement, parameters in recorder.statements:
+        unique.setdefault(statement, parameters)
+    return [(statement, await explain(read_engine, statement, parameters, enable_seqscan=False))
+            for statement, parameters in unique.items()]
+
+
+@pytest.mark.parametrize("name", sorted(name for name in SCENARIOS if name != "users_login"))
+async def test_scenario_has_no_seq_scans(client, recorder, name):
+    random.seed(1)
+    data = await Dataset.discover(client, SimpleNamespace(email=None, password=None))
+    for _ in range(3):
+        method, path, kwargs = SCENARIOS[name](data)
+        for statement, plan in await _plans(recorder, client, method, path, **kwargs):
+            scans = _seq_scans(plan, set(CHECKED_TABLES))
+            assert not scans, f"Seq Scan по {', '.join(scans)}: {' '.join(statement.split())}"
+
+
+@pytest.mark.parametrize("in_stock", ["true", "false"])
+@pytest.mark.parametrize("sort", ["id", "-id", "price", "-price", "rating", "-rating"])
+async def test_listing_page_is_read_in_index_order(client, recorder, sort, in_stock):
+    """
+    Страница списка товаров (в том числе фильтр «в наличии», он включён по умолчанию)
+    читается из product_listings по индексу в порядке сортировки, без Sort и Seq Scan.
+    """
+    plans = await _plans(recorder, client, "GET", "/products/",
+                         params={"sort": sort, "in_stock": in_stock, "limit": 20})
+    listing_plans = [(statement, plan) for statement, plan in plans if "product_listings" in statement]
+    assert listing_plans
+
+    for statement, plan in listing_plans:
+        nodes = list(_nodes(plan))
+        scans = [node for node in nodes if node.get("Relation Name") == "product_listings"]
+        assert scans and all(node["Node Type"] in ("Index Scan", "Index Only Scan") for node in scans), \
+            f"{[node['Node Type'] for node in scans]}: {' '.join(statement.split())}"
+        assert not any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes), \
+            f"Сортировка не по индексу: {' '.join(statement.split())}"
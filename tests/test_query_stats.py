@@ -0,0 +1,101 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.middleware.query_stats import QueryStatsMiddleware, assert_max_queries, count_queries, install_query_hooks
+from benchmarks.load import SCENARIOS, Dataset
+from benchmarks.query_budgets import BUDGETS
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """
+    SQLite в памяти с теми же хуками, что и у engine приложения
+    (install_query_hooks использует только sync_engine).
+    """
+    sync_engine = create_engine("sqlite://")
+    install_query_hooks(SimpleNamespace(sync_engine=sync_engine))
+    yield sync_engine
+    sync_engine.dispose()
+
+
+def run_queries(engine, count: int) -> None:
+    with engine.connect() as conn:
+        for _ in range(count):
+            conn.execute(text("SELECT 1"))
+
+
+def test_count_queries_counts_statements(engine):
+    with count_queries() as stats:
+        run_queries(engine, 3)
+    assert stats.count == 3
+    assert stats.seconds > 0
+
+
+def test_queries_outside_block_are_not_counted(engine):
+    with count_queries() as stats:
+        pass
+    run_queries(engine, 2)
+    assert stats.count == 0
+
+
+def test_nested_count_queries_add_to_outer(engine):
+    with count_queries() as outer:
+        run_queries(engine, 1)
+        with count_queries() as inner:
+            run_queries(engine, 2)
+        run_queries(engine, 1)
+    assert inner.count == 2
+    assert outer.count == 4
+
+
+def test_assert_max_queries(engine):
+    with assert_max_queries(2):
+        run_queries(engine, 2)
+    with pytest.raises(AssertionError, match="выполнено 3"):
+        with assert_max_queries(2):
+            run_queries(engine, 3)
+
+
+async def test_middleware_stats_nest_under_outer_counter(engine):
+    async def app(scope, receive, send):
+        run_queries(engine, 2)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    with count_queries() as stats:
+        await QueryStatsMiddleware(app)(scope, receive, send)
+    assert stats.count == 2
+    assert messages[0]["status"] == 200
+
+
+@pytest.mark.parametrize("name", sorted(BUDGETS))
+async def test_endpoint_query_budget(client, name):
+    """
+    Бюджеты SQL-запросов эндпоинтов (BUDGETS из benchmarks.query_budgets).
+    Первый запрос не учитывается: он может загрузить снимок дерева категорий.
+    """
+    random.seed(1)
+    data = await Dataset.discover(client, SimpleNamespace(email=None, password=None))
+    scenario = SCENARIOS[name]
+    method, path, kwargs = scenario(data)
+    await client.request(method, path, **kwargs)
+
+    for _ in range(3):
+        method, path, kwargs = scenario(data)
+        with assert_max_queries(BUDGETS[name]):
+            response = await client.request(method, path, **kwargs)
+        assert response.status_code < 500, f"{method} {path}: {response.status_code}"
@@ -0,0 +1,47 @@
+import pytest
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RateLimiter, SharedStoreBackend, TokenBucketBackend, _client_ip
+from app.utils.kv_store import InMemoryKeyValueStore
+
+pytestmark = pytest.mark.anyio
+
+ROUTE = "POST /orders"
+
+
+@pytest.fixture(params=["token_bucket", "shared_store"])
+def limiter(request) -> RateLimiter:
+    backend = (TokenBucketBackend(max_buckets=100, idle_ttl=3600) if request.param == "token_bucket"
+               else SharedStoreBackend(InMemoryKeyValueStore()))
+    return RateLimiter(backend, {ROUTE: ["ip:5/600", "user:1/600"]})
+
+
+async def check(limiter: RateLimiter, user_id: int) -> float:
+    route, limits = limiter.limits_for("POST", "/orders")
+    return await limiter.check(route, limits, "10.0.0.1", user_id)
+
+
+async def test_rejected_request_does_not_consume_other_limits(limiter):
+    assert await check(limiter, user_id=1) == 0
+    # Отклонён лимитом пользователя: токен IP-лимита должен вернуться
+    assert await check(limiter, user_id=1) > 0
+    for user_id in range(2, 6):
+        assert await check(limiter, user_id) == 0
+    assert await check(limiter, user_id=6) > 0
+    assert limiter.rejected == {ROUTE: 2}
+
+
+def scope(*forwarded: bytes) -> dict:
+    return {"headers": [(b"x-forwarded-for", value) for value in forwarded], "client": ("192.0.2.10", 1234)}
+
+
+@pytest.mark.parametrize("hops, expected", [
+    (0, "192.0.2.10"),
+    (1, "10.0.0.2"),
+    (2, "203.0.113.7"),
+    (4, "192.0.2.10"),
+])
+def test_client_ip_uses_trusted_hops_from_the_right(monkeypatch, hops, expected):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_TRUSTED_PROXIES", hops)
+    # Левую запись подставил клиент, правые дописаны доверенными прокси
+    assert _client_ip(scope(b"6.6.6.6, 203.0.113.7", b"10.0.0.2")) == expected
@@ -0,0 +1,78 @@
+import pytest
+
+from app.utils import rating_queue as rating_queue_module
+from app.utils.rating_queue import RatingQueue
+from app.utils.response_cache import CachedResponse, MemoryBackend, ResponseCache, product_tag
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def commit(self) -> None:
+        pass
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """
+    Очередь без базы: пересчёт находит расхождение только у товара 2.
+    """
+    bumped = []
+
+    async def rebuild_product_ratings(db, product_ids):
+        return [{"product_id": 2}] if 2 in product_ids else []
+
+    async def bump_product_versions(db, product_ids):
+        bumped.extend(product_ids)
+
+    cache = ResponseCache(MemoryBackend(100, 60), ttl=60)
+    monkeypatch.setattr(rating_queue_module, "async_session_maker", FakeSession)
+    monkeypatch.setattr(rating_queue_module, "rebuild_product_ratings", rebuild_product_ratings)
+    monkeypatch.setattr(rating_queue_module, "bump_product_versions", bump_product_versions)
+    monkeypatch.setattr(rating_queue_module, "response_cache", cache)
+    queue = RatingQueue(debounce=0, batch_size=10)
+    queue.bumped = bumped
+    queue.cache = cache
+    return queue
+
+
+async def cached_body(cache: ResponseCache, key: str, tags=()) -> bytes:
+    async def load() -> CachedResponse:
+        return CachedResponse(b"fresh")
+    return (await cache.get_or_load("products", key, load, tags=tags)).body
+
+
+async def seed(cache: ResponseCache, key: str, tags=()) -> None:
+    async def load() -> CachedResponse:
+        return CachedResponse(b"stale")
+    await cache.get_or_load("products", key, load, tags=tags)
+
+
+async def test_flush_bumps_versions_of_products_without_drift(queue):
+    queue.mark_dirty(1, 2, 3)
+    await queue.flush()
+    # Версию товара 2 увеличил пересчёт расхождения
+    assert queue.bumped == [1, 3]
+
+
+async def test_flush_invalidates_cards_of_flushed_products(queue):
+    await seed(queue.cache, "/products/1?", [product_tag(1)])
+    await seed(queue.cache, "/products/5?", [product_tag(5)])
+    await seed(queue.cache, "/products/?")
+
+    queue.mark_dirty(1)
+    await queue.flush()
+    assert await cached_body(queue.cache, "/products/1?", [product_tag(1)]) == b"fresh"
+    # Без расхождения рейтинги в списках не менялись
+    assert await cached_body(queue.cache, "/products/5?", [product_tag(5)]) == b"stale"
+    assert await cached_body(queue.cache, "/products/?") == b"stale"
+
+    queue.mark_dirty(2)
+    await queue.flush()
+    assert await cached_body(queue.cache, "/products/?") == b"fresh"